@@ -261,7 +261,12 @@ export interface UseLocalTranscriptionReturn {
   benchmark: DeviceBenchmark | null;
   transcribe: (audioBlob: Blob, modelId: string) => Promise<LocalTranscriptionResult>;
   transcribeStreaming: (audioBlob: Blob, modelId: string, onSegmentReceived?: (segment: { text: string; start: number; end: number; speaker?: string | null }) => void) => Promise<LocalTranscriptionResult>; // 🆕 STREAMING
-  transcribeChunkLive: (chunk: Blob, chunkIndex: number, onSegmentReceived: (segment: { text: string; start: number; end: number; speaker?: string | null }) => void) => Promise<void>; // 🚀 LIVE CHUNK STREAMING
+  transcribeChunkLive: (
+    chunk: Blob,
+    chunkIndex: number,
+    onSegmentReceived: (segment: { text: string; start: number; end: number; speaker?: string | null }) => void,
+    onSpeakersReceived?: (segments: Array<{ text: string; start: number; end: number; speaker?: string | null }>) => void
+  ) => Promise<void>; // 🚀 LIVE CHUNK STREAMING
   cancelTranscription: () => void;
   runBenchmark: () => Promise<DeviceBenchmark>;
   enhanceWithLocalLLM: (transcript: string, prompts: { title?: string, summary?: string, transcript?: string }, ollamaModel?: string) => Promise<{ title: string, summary: string, enhancedTranscript?: any }>;
@@ -1267,7 +1272,8 @@ RÉSUMÉ: [résumé des points clés et actions]`
   const transcribeChunkLive = useCallback(async (
     chunk: Blob,
     chunkIndex: number,
-    onSegmentReceived: (segment: { text: string; start: number; end: number; speaker?: string | null }) => void
+    onSegmentReceived: (segment: { text: string; start: number; end: number; speaker?: string | null }) => void,
+    onSpeakersReceived?: (segments: Array<{ text: string; start: number; end: number; speaker?: string | null }>) => void
   ): Promise<void> => {
 
     const chunkStartTime = Date.now();
@@ -1301,6 +1307,8 @@ RÉSUMÉ: [résumé des points clés et actions]`
       const transcriptionStart = Date.now();
 
       let segmentCount = 0;
+      // Segments déjà transmis, dans l'ordre d'émission (les locuteurs arrivent après)
+      const emittedSegments: Array<{ text: string; start: number; end: number; speaker?: string | null }> = [];
       await transcribeWithWhisperXStreamingClient(
         chunk,
         {
@@ -1328,11 +1336,27 @@ RÉSUMÉ: [résumé des points clés et actions]`
           console.log(`[chunkLive]   └─ Time: ${adjustedSegment.start.toFixed(2)}s - ${adjustedSegment.end.toFixed(2)}s`);
 
           console.log(`%c[chunkLive] 🔄 CALLING onSegmentReceived callback...`, 'color: #3b82f6; font-weight: bold');
+          emittedSegments.push(adjustedSegment);
           onSegmentReceived(adjustedSegment);
           console.log(`%c[chunkLive] ✅ Callback executed successfully`, 'color: #16a34a');
         },
         // Callback de progression (ignoré pour les chunks live)
-        () => { }
+        () => { },
+        // 🎭 Diarisation terminée : on complète les locuteurs des segments déjà émis
+        (updates) => {
+          const patched: typeof emittedSegments = [];
+          for (const { index, speaker } of updates) {
+            const emitted = emittedSegments[index];
+            if (emitted && speaker) {
+              emitted.speaker = speaker;
+              patched.push(emitted);
+            }
+          }
+          console.log(`[chunkLive] 🎭 Speakers received for ${patched.length} segments of chunk #${chunkIndex}`);
+          if (patched.length > 0) {
+            onSpeakersReceived?.(patched);
+          }
+        }
       );
 
       const transcriptionTime = Date.now() - transcriptionStart;
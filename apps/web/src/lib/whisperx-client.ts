@@ -320,6 +320,8 @@ export async function detectOptimalDiarizationBackend(): Promise<{
  * @param options - Options de transcription
  * @param onSegment - Callback appelé pour chaque segment reçu en temps réel
  * @param onProgress - Callback de progression (optionnel)
+ * @param onSpeakers - Callback appelé quand la diarisation attribue les locuteurs
+ *   aux segments déjà émis (index = ordre d'émission via onSegment)
  * @returns Transcription complète une fois terminée
  */
 export async function transcribeWithWhisperXStreaming(
@@ -330,7 +332,8 @@ export async function transcribeWithWhisperXStreaming(
     diarization?: boolean;
   },
   onSegment?: (segment: WhisperXSegment) => void,
-  onProgress?: (progress: { status: string; progress?: number }) => void
+  onProgress?: (progress: { status: string; progress?: number }) => void,
+  onSpeakers?: (updates: Array<{ index: number; speaker: string | null }>) => void
 ): Promise<WhisperXTranscriptionResult> {
   
   console.log(`%c[WhisperX] 🚀 STARTING STREAMING TRANSCRIPTION`, 'color: #7c3aed; font-weight: bold; font-size: 16px');
@@ -429,6 +432,20 @@ export async function transcribeWithWhisperXStreaming(
               }
               break;
               
+            case 'speakers':
+              // Diarisation terminée après le streaming des segments : on complète les locuteurs
+              const speakerUpdates: Array<{ index: number; speaker: string | null }> = [];
+              for (const update of eventData.segments || []) {
+                if (segments[update.id]) {
+                  segments[update.id].speaker = update.speaker || null;
+                  speakerUpdates.push({ index: update.id, speaker: update.speaker || null });
+                }
+              }
+              // Les segments déjà transmis via onSegment sont des copies côté appelant
+              onSpeakers?.(speakerUpdates);
+              console.log(`[WhisperX] 🎭 Speakers assigned to ${eventData.segments?.length || 0} segments`);
+              break;
+
             case 'complete':
               console.log(`%c[WhisperX] ✅ TRANSCRIPTION COMPLETE!`, 'color: #16a34a; font-weight: bold; font-size: 14px');
               console.log(`[WhisperX] 📝 Total segments: ${eventData.total_segments || segments.length}`);
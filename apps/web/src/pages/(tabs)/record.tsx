@@ -220,6 +220,15 @@ export default function RecordingScreen() {
   const speakerMappingRef = useRef<SpeakerMapping>({}); // 🎭 Ref pour accès synchrone au mapping
   const transcriptionContainerRef = useRef<HTMLDivElement>(null); // 📜 Ref pour auto-scroll
 
+  // 🎭 Locuteurs reçus après les segments d'un chunk live (diarisation en fin de chunk)
+  const applyLiveSpeakers = useCallback((labeled: SpeakerSegment[]) => {
+    setLiveTranscriptionSegments(prev => prev.map(segment => {
+      const match = labeled.find(l => l.start === segment.start && l.end === segment.end && l.text === segment.text);
+      if (!match?.speaker || segment.speaker) return segment;
+      return { ...segment, speaker: speakerMappingRef.current[match.speaker] || match.speaker };
+    }));
+  }, []);
+
   const {
     isRecording,
     isPaused: recorderIsPaused,
@@ -930,7 +939,7 @@ export default function RecordingScreen() {
                   }
                   setLiveTranscriptionSegments(updatedSegments);
                   options.onSegment(segment);
-                }).catch((err: Error) => {
+                }, applyLiveSpeakers).catch((err: Error) => {
                   console.error('[Orchestrator/whisperx] chunk error:', err);
                 });
               });
@@ -1163,7 +1172,9 @@ export default function RecordingScreen() {
               console.log(`%c[record] 📊 UPDATING UI WITH ${updatedSegments.length} SEGMENTS`, 'color: #3b82f6; font-weight: bold');
               setLiveTranscriptionSegments(updatedSegments);
               console.log(`%c[record] ✅ UI UPDATED!`, 'color: #16a34a; font-weight: bold');
-            }
+            },
+            // Locuteurs attribués après coup par la diarisation du chunk
+            applyLiveSpeakers
           ).catch(err => {
             console.error(`[record] ❌ Failed to transcribe chunk #${chunkIndex}:`, err);
           });
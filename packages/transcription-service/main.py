@@ -2,17 +2,27 @@
 Service de transcription PyTorch OPTIONNEL
 Fonctionne en PARALLÈLE avec les APIs existantes (Gemini, OpenAI, etc.)
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+import numpy as np
 import torch
 import whisper
 import tempfile
+import time
 import os
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Callable, Any
 import logging
 
+from result_cache import RESULT_CACHE, make_cache_key
+from model_residency import MODEL_RAM_BUDGET_MB, ResidentModelManager
+
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -40,6 +50,43 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization"],
 )
 
+# Upload écrit sur disque par blocs : la mémoire par requête ne dépend plus de la taille du fichier
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "2048"))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+@app.middleware("http")
+async def upload_size_limit(request: Request, call_next):
+    """Rejette les uploads trop gros d'après Content-Length, avant de lire le corps"""
+    if request.method == "POST" and request.url.path == "/transcribe":
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Upload exceeds the maximum size of {MAX_UPLOAD_MB} MB"}
+            )
+    return await call_next(request)
+
+async def spool_upload(file: UploadFile, dest_path: Path) -> str:
+    """Écrit l'upload sur disque par blocs de taille fixe et retourne son SHA-256"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest_path, "wb") as out:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Upload exceeds the maximum size of {MAX_UPLOAD_MB} MB"
+                )
+            digest.update(chunk)
+            out.write(chunk)
+    logger.info(f"📤 Audio saved: {size / 1024:.2f} KB")
+    return digest.hexdigest()
+
 # État du service
 SERVICE_STATUS = {
     "available": False,
@@ -50,10 +97,48 @@ SERVICE_STATUS = {
 }
 
 # Modèles chargés (lazy loading)
-whisper_model = None
-whisper_model_name = None  # Tracker du nom du modèle chargé
 diarization_pipeline = None
 
+# Pool d'inférence borné : Whisper et pyannote tournent hors de la boucle asyncio
+# pour que /health et /status restent réactifs pendant une transcription.
+# Avec plusieurs workers, les appels sur un même modèle restent sérialisés
+# (model_residency.SerializedModel) : seuls des modèles différents tournent en parallèle
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+inference_executor = ThreadPoolExecutor(
+    max_workers=max(1, INFERENCE_WORKERS),
+    thread_name_prefix="inference"
+)
+INFERENCE_STATS = {
+    "workers": max(1, INFERENCE_WORKERS),
+    "queued": 0,
+    "in_flight": 0,
+    "completed": 0,
+    "failed": 0
+}
+_inference_stats_lock = threading.Lock()
+
+async def run_inference(fn: Callable, *args, **kwargs) -> Any:
+    """Exécute un appel bloquant sur le pool d'inférence et attend son résultat"""
+    with _inference_stats_lock:
+        INFERENCE_STATS["queued"] += 1
+
+    def job():
+        with _inference_stats_lock:
+            INFERENCE_STATS["queued"] -= 1
+            INFERENCE_STATS["in_flight"] += 1
+        succeeded = False
+        try:
+            result = fn(*args, **kwargs)
+            succeeded = True
+            return result
+        finally:
+            with _inference_stats_lock:
+                INFERENCE_STATS["in_flight"] -= 1
+                INFERENCE_STATS["completed" if succeeded else "failed"] += 1
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, job)
+
 class TranscriptionRequest(BaseModel):
     """Requête de transcription"""
     audio_url: Optional[str] = None
@@ -70,6 +155,7 @@ class TranscriptionResponse(BaseModel):
     speakers: Optional[List[Dict]] = None
     model_used: str
     processing_time: float
+    cached: bool = False  # True si servi depuis le cache de résultats
 
 @app.get("/health")
 async def health_check():
@@ -77,9 +163,23 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "transcription-pytorch",
-        **SERVICE_STATUS
+        **SERVICE_STATUS,
+        "ready": WARMUP_STATUS["ready"]
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness : 503 tant que le préchauffage n'est pas terminé, ou s'il a échoué (dégradé)"""
+    ready = WARMUP_STATUS["ready"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "warm_up": WARMUP_STATUS,
+            "resident_models": MODEL_MANAGER.stats()
+        }
+    )
+
 @app.get("/status")
 async def get_status():
     """État détaillé du service"""
@@ -95,7 +195,11 @@ async def get_status():
         "models": {
             "whisper": SERVICE_STATUS["model_loaded"],
             "diarization": SERVICE_STATUS["diarization_available"] or diarization_can_be_enabled
-        }
+        },
+        "inference": dict(INFERENCE_STATS),
+        "resident_models": MODEL_MANAGER.stats(),
+        "warm_up": WARMUP_STATUS,
+        "result_cache": RESULT_CACHE.stats()
     }
 
 @app.post("/download-pyannote")
@@ -111,7 +215,7 @@ async def download_pyannote():
     
     try:
         logger.info("📥 Starting Pyannote models download...")
-        success = load_diarization_model()
+        success = await run_inference(load_diarization_model)
         
         if success:
             return {
@@ -131,31 +235,102 @@ async def download_pyannote():
             detail=f"Download failed: {str(e)}"
         )
 
+def _load_whisper(model_name: str):
+    """Charge un modèle Whisper (appelé par MODEL_MANAGER, une fois par modèle)"""
+    global SERVICE_STATUS
+    
+    # Détection du device (GPU si disponible)
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    SERVICE_STATUS["device"] = device
+    
+    model = whisper.load_model(model_name, device=device)
+    logger.info(f"✅ Whisper {model_name} loaded on {device}")
+    return model
+
+# Modèles Whisper résidents : plusieurs tailles gardées en mémoire (LRU, budget RAM)
+MODEL_MANAGER = ResidentModelManager(_load_whisper, MODEL_RAM_BUDGET_MB * 1024 * 1024)
+
+# Préchargement au démarrage : "base:fr,medium:en" (modèle[:langue], vide = aucun)
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "")
+
+def parse_preload_spec(spec: str) -> List[tuple]:
+    """"base:fr,medium" -> [("base", "fr"), ("medium", None)]"""
+    targets = []
+    for item in spec.split(","):
+        model_name, _, language = item.strip().partition(":")
+        target = (model_name.strip(), language.strip() or None)
+        if target[0] and target not in targets:
+            targets.append(target)
+    return targets
+
+PRELOAD_TARGETS = parse_preload_spec(PRELOAD_MODELS)
+WARMUP_STATUS = {
+    "complete": not PRELOAD_TARGETS,
+    "ready": not PRELOAD_TARGETS,  # Terminé sans échec
+    "degraded": False,             # Terminé, mais au moins un modèle en échec
+    "targets": [f"{m}:{l}" if l else m for m, l in PRELOAD_TARGETS],
+    "done": [],
+    "failed": {},
+    "seconds": 0.0
+}
+
+def _synthetic_audio(seconds: float = 2.0) -> np.ndarray:
+    """Signal de test proche de la voix (150 Hz + harmoniques, modulé comme des syllabes)"""
+    t = np.arange(int(seconds * whisper.audio.SAMPLE_RATE), dtype=np.float32) / whisper.audio.SAMPLE_RATE
+    tone = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 6))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    return (0.1 * tone * envelope).astype(np.float32)
+
+def _warm_up_model(model_name: str, language: Optional[str]):
+    """Charge le modèle et exécute une inférence factice (bloquant)"""
+    model = load_whisper_model(model_name)
+    if model is None:
+        raise RuntimeError(SERVICE_STATUS["error"] or f"Failed to load {model_name}")
+    model.transcribe(
+        _synthetic_audio(),
+        language=language,
+        fp16=SERVICE_STATUS["device"] == "cuda",
+        verbose=None
+    )
+
+async def warm_up_models():
+    """Préchauffe PRELOAD_MODELS ; /ready répond 503 tant que ce n'est pas terminé"""
+    start = time.time()
+    for model_name, language in PRELOAD_TARGETS:
+        name = f"{model_name}:{language}" if language else model_name
+        logger.info(f"🔥 Warming up Whisper {name}...")
+        try:
+            await run_inference(_warm_up_model, model_name, language)
+            WARMUP_STATUS["done"].append(name)
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up of {name} failed: {e}")
+            WARMUP_STATUS["failed"][name] = str(e)
+    WARMUP_STATUS["seconds"] = round(time.time() - start, 2)
+    WARMUP_STATUS["complete"] = True
+    WARMUP_STATUS["ready"] = not WARMUP_STATUS["failed"]
+    WARMUP_STATUS["degraded"] = bool(WARMUP_STATUS["failed"])
+    logger.info(f"🔥 Warm-up complete in {WARMUP_STATUS['seconds']}s")
+    if WARMUP_STATUS["degraded"]:
+        logger.error(f"❌ Preload failed for {', '.join(WARMUP_STATUS['failed'])}: node stays not ready")
+
+_warm_up_task = None
+
 def load_whisper_model(model_name: str = "medium"):
-    """Charge le modèle Whisper (lazy loading)"""
-    global whisper_model, whisper_model_name, SERVICE_STATUS
+    """Retourne le modèle Whisper demandé, chargé si besoin (None en cas d'échec)"""
+    global SERVICE_STATUS
     
     try:
-        logger.info(f"Loading Whisper model: {model_name}")
-        
-        # Détection du device (GPU si disponible)
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        SERVICE_STATUS["device"] = device
-        
-        # Chargement du modèle
-        whisper_model = whisper.load_model(model_name, device=device)
-        whisper_model_name = model_name  # Stocker le nom du modèle
+        model = MODEL_MANAGER.get(model_name)
         SERVICE_STATUS["model_loaded"] = True
         SERVICE_STATUS["available"] = True
-        
-        logger.info(f"✅ Whisper {model_name} loaded on {device}")
-        return True
+        SERVICE_STATUS["error"] = None
+        return model
         
     except Exception as e:
         logger.error(f"❌ Failed to load Whisper: {e}")
         SERVICE_STATUS["error"] = str(e)
         SERVICE_STATUS["available"] = False
-        return False
+        return None
 
 def load_diarization_model():
     """Charge le modèle de diarisation (optionnel)"""
@@ -191,6 +366,58 @@ def load_diarization_model():
         SERVICE_STATUS["diarization_available"] = False
         return False
 
+def _run_transcription(model, audio_path: str, language: str, enable_diarization: bool):
+    """Transcription Whisper + diarisation optionnelle (bloquant, à exécuter via run_inference)"""
+    # Transcription avec Whisper
+    result = model.transcribe(
+        audio_path,
+        language=language,
+        task="transcribe",
+        verbose=False
+    )
+
+    # Extraction des segments
+    segments = [
+        {
+            "id": seg["id"],
+            "start": seg["start"],
+            "end": seg["end"],
+            "text": seg["text"],
+        }
+        for seg in result["segments"]
+    ]
+
+    # Diarisation (optionnel)
+    speakers = None
+    if enable_diarization:
+        # Charger le modèle de diarisation si pas encore fait
+        if not SERVICE_STATUS["diarization_available"]:
+            logger.info("🔄 Loading diarization model (first time)...")
+            load_diarization_model()
+
+        # Utiliser la diarisation si disponible
+        if SERVICE_STATUS["diarization_available"]:
+            try:
+                logger.info("Performing speaker diarization...")
+                diarization = diarization_pipeline(audio_path)
+
+                speakers = []
+                for turn, _, speaker in diarization.itertracks(yield_label=True):
+                    speakers.append({
+                        "speaker": speaker,
+                        "start": turn.start,
+                        "end": turn.end
+                    })
+
+                logger.info(f"✅ Identified {len(set([s['speaker'] for s in speakers]))} speakers")
+
+            except Exception as e:
+                logger.error(f"⚠️ Diarization failed: {e}")
+        else:
+            logger.warning("⚠️ Diarization requested but model not available (check HUGGINGFACE_TOKEN)")
+
+    return result, segments, speakers
+
 @app.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
     file: UploadFile = File(...),
@@ -209,75 +436,58 @@ async def transcribe_audio(
     # Log des paramètres reçus
     logger.info(f"📥 Received: model={model}, language={language}, enable_diarization={enable_diarization}")
     
-    # Charger le modèle si nécessaire (lazy loading)
-    global whisper_model, whisper_model_name
-    if whisper_model is None or whisper_model_name != model:
-        logger.info(f"🔄 Loading Whisper model: {model}")
-        if not load_whisper_model(model):
-            raise HTTPException(
-                status_code=503,
-                detail="Failed to load model. Fallback to API providers."
-            )
-    
     # Sauvegarder le fichier temporairement
     temp_dir = tempfile.mkdtemp()
     audio_path = Path(temp_dir) / file.filename
     
     try:
-        # Écrire le fichier audio
-        with open(audio_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        # Écrire le fichier audio (par blocs, hashé au passage)
+        audio_sha256 = await spool_upload(file, audio_path)
+        
+        # Même audio + mêmes paramètres déjà transcrits : réponse depuis le cache
+        cache_key = make_cache_key(
+            audio_sha256,
+            language=language,
+            model=model,
+            enable_diarization=enable_diarization
+        )
+        cached = await asyncio.to_thread(RESULT_CACHE.get, cache_key)
+        if cached is not None:
+            logger.info("💾 Result cache hit, skipping transcription")
+            return TranscriptionResponse(
+                **cached,
+                processing_time=time.time() - start_time,
+                cached=True
+            )
+        
+        # Modèle résident ou chargé à la demande (un seul chargement par modèle)
+        whisper_model = await run_inference(load_whisper_model, model)
+        if whisper_model is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Failed to load model. Fallback to API providers."
+            )
         
         logger.info(f"Transcribing {file.filename} with Whisper {model}")
         
-        # Transcription avec Whisper
-        result = whisper_model.transcribe(
+        # Transcription + diarisation sur le pool d'inférence (hors boucle asyncio)
+        result, segments, speakers = await run_inference(
+            _run_transcription,
+            whisper_model,
             str(audio_path),
-            language=language,
-            task="transcribe",
-            verbose=False
+            language,
+            enable_diarization
         )
         
-        # Extraction des segments
-        segments = [
-            {
-                "id": seg["id"],
-                "start": seg["start"],
-                "end": seg["end"],
-                "text": seg["text"],
-            }
-            for seg in result["segments"]
-        ]
-        
-        # Diarisation (optionnel)
-        speakers = None
-        if enable_diarization:
-            # Charger le modèle de diarisation si pas encore fait
-            if not SERVICE_STATUS["diarization_available"]:
-                logger.info("🔄 Loading diarization model (first time)...")
-                load_diarization_model()
-            
-            # Utiliser la diarisation si disponible
-            if SERVICE_STATUS["diarization_available"]:
-                try:
-                    logger.info("Performing speaker diarization...")
-                    diarization = diarization_pipeline(str(audio_path))
-                    
-                    speakers = []
-                    for turn, _, speaker in diarization.itertracks(yield_label=True):
-                        speakers.append({
-                            "speaker": speaker,
-                            "start": turn.start,
-                            "end": turn.end
-                        })
-                    
-                    logger.info(f"✅ Identified {len(set([s['speaker'] for s in speakers]))} speakers")
-                    
-                except Exception as e:
-                    logger.error(f"⚠️ Diarization failed: {e}")
-            else:
-                logger.warning("⚠️ Diarization requested but model not available (check HUGGINGFACE_TOKEN)")
+        # Pas de mise en cache si la diarisation demandée n'a pas pu être faite
+        if not enable_diarization or speakers is not None:
+            await asyncio.to_thread(RESULT_CACHE.put, cache_key, {
+                "transcript": result["text"],
+                "language": result["language"],
+                "segments": segments,
+                "speakers": speakers,
+                "model_used": f"whisper-{model}"
+            })
         
         processing_time = time.time() - start_time
         
@@ -290,6 +500,8 @@ async def transcribe_audio(
             processing_time=processing_time
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Transcription error: {e}")
         raise HTTPException(
@@ -312,9 +524,12 @@ async def startup_event():
     logger.info(f"PyTorch version: {torch.__version__}")
     logger.info(f"CUDA available: {torch.cuda.is_available()}")
     
-    # Pré-charger le modèle par défaut (optionnel)
-    # load_whisper_model("medium")
-    # load_diarization_model()
+    # Préchargement + préchauffage en tâche de fond (PRELOAD_MODELS)
+    global _warm_up_task
+    if PRELOAD_TARGETS:
+        logger.info(f"🔥 Preloading models: {', '.join(WARMUP_STATUS['targets'])}")
+        _warm_up_task = asyncio.create_task(warm_up_models())
+        return
     
     logger.info("✅ Service ready (models will load on first request)")
 
@@ -322,6 +537,7 @@ async def startup_event():
 async def shutdown_event():
     """Nettoyage à l'arrêt"""
     logger.info("🛑 Shutting down Transcription Service")
+    inference_executor.shutdown(wait=False, cancel_futures=True)
 
 if __name__ == "__main__":
     import uvicorn
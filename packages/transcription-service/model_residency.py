@@ -0,0 +1,156 @@
+"""
+Gestionnaire de modèles Whisper résidents
+Garde plusieurs modèles en mémoire dans la limite d'un budget RAM, avec
+éviction LRU : des clients qui alternent `small` / `medium` ne provoquent
+plus de rechargement à chaque requête.
+
+Les chargements sont "single-flight" : si plusieurs requêtes demandent en
+même temps un modèle absent, une seule le charge, les autres attendent le
+même chargement.
+
+Les modèles servis sont enveloppés dans `SerializedModel` : un seul appel à
+`transcribe` à la fois par modèle, même avec INFERENCE_WORKERS > 1.
+
+Configuration :
+- MODEL_RAM_BUDGET_MB : mémoire max des modèles résidents (défaut : 8192)
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+MODEL_RAM_BUDGET_MB = int(os.getenv("MODEL_RAM_BUDGET_MB", "8192"))
+
+
+def estimate_model_bytes(model) -> int:
+    """Estimation de la mémoire d'un modèle torch (paramètres + buffers)"""
+    total = 0
+    try:
+        for tensor in list(model.parameters()) + list(model.buffers()):
+            total += tensor.numel() * tensor.element_size()
+    except Exception as e:
+        logger.debug(f"Taille du modèle inconnue : {e}")
+    return total
+
+
+class SerializedModel:
+    """
+    Modèle Whisper partagé dont `transcribe` s'exécute un appel à la fois
+
+    Chaque décodage openai-whisper installe des hooks de kv-cache sur le
+    décodeur partagé : deux appels simultanés (plusieurs INFERENCE_WORKERS)
+    liraient le cache l'un de l'autre, jusqu'à des erreurs de dimensions.
+    Les autres attributs sont lus sur le modèle enveloppé.
+    """
+
+    def __init__(self, model):
+        self._model = model
+        self.lock = threading.Lock()
+
+    def transcribe(self, *args, **kwargs):
+        with self.lock:
+            return self._model.transcribe(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+class ResidentModelManager:
+    """
+    Cache LRU de modèles, borné en mémoire
+
+    - loader : callable(nom) -> modèle (bloquant), servi enveloppé dans SerializedModel
+    - max_bytes : budget ; le modèle le plus récent est toujours gardé,
+      même s'il dépasse seul le budget
+    """
+
+    def __init__(self, loader: Callable[[str], Any], max_bytes: int):
+        self._loader = loader
+        self.max_bytes = max_bytes
+        self._models: "OrderedDict[str, tuple]" = OrderedDict()  # nom -> (modèle, taille)
+        self._lock = threading.Lock()                # protège _models et _load_locks
+        self._load_locks: Dict[str, threading.Lock] = {}  # un verrou par modèle en chargement
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def is_resident(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str) -> Any:
+        """Retourne le modèle `name`, en le chargeant si besoin (une seule fois)"""
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is not None:
+                self._models.move_to_end(name)
+                self.hits += 1
+                return entry[0]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Chargement hors du verrou global : les autres modèles restent servis
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(name)
+                if entry is not None:
+                    # Chargé par une requête concurrente pendant l'attente
+                    self._models.move_to_end(name)
+                    self.hits += 1
+                    return entry[0]
+                self.misses += 1
+
+            logger.info(f"📥 Loading Whisper model: {name}")
+            start = time.time()
+            try:
+                model = SerializedModel(self._loader(name))
+                size = estimate_model_bytes(model)
+                logger.info(
+                    f"✅ Whisper {name} loaded in {time.time() - start:.1f}s "
+                    f"({size / 1024 / 1024:.0f} MB)"
+                )
+                with self._lock:
+                    self._models[name] = (model, size)
+                    self._evict()
+            finally:
+                # Même en cas d'échec : le modèle ne reste pas affiché « loading »
+                with self._lock:
+                    self._load_locks.pop(name, None)
+            return model
+
+    def _evict(self):
+        """Retire les modèles les moins récemment utilisés jusqu'à respecter le budget"""
+        evicted = False
+        while len(self._models) > 1 and self.used_bytes > self.max_bytes:
+            name, _ = self._models.popitem(last=False)
+            self.evictions += 1
+            evicted = True
+            logger.info(f"🗑️ Evicted Whisper model: {name}")
+        if evicted:
+            try:
+                import torch
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "resident": {
+                    name: round(size / 1024 / 1024, 1) for name, (_, size) in self._models.items()
+                },
+                "loading": list(self._load_locks.keys()),
+                "used_mb": round(self.used_bytes / 1024 / 1024, 1),
+                "budget_mb": round(self.max_bytes / 1024 / 1024, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,133 @@
+"""
+Cache disque des résultats de transcription
+Clé : SHA-256 de l'audio + paramètres qui changent le résultat (modèle, langue, diarisation)
+
+Un même enregistrement re-soumis (retry client, relance) est servi depuis le
+cache au lieu de relancer Whisper. Les entrées sont des fichiers JSON ; au-delà
+du budget, les moins récemment utilisées sont supprimées.
+
+Configuration :
+- RESULT_CACHE_DIR : répertoire du cache (défaut : /root/.cache/transcription-results)
+- RESULT_CACHE_MAX_MB : budget disque, 0 désactive le cache (défaut : 512)
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "/root/.cache/transcription-results")
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "512"))
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 d'un fichier, lu par blocs de taille fixe"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(audio_sha256: str, **params) -> str:
+    """Clé de cache : hash de l'audio + paramètres influençant le résultat"""
+    payload = json.dumps({"audio": audio_sha256, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Stockage LRU de résultats JSON sur disque, borné en taille"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = max_bytes > 0
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _entries(self):
+        try:
+            with os.scandir(self.cache_dir) as it:
+                return [entry for entry in it if entry.name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+
+    def _ensure_total(self):
+        if self._total_bytes is None:
+            self._total_bytes = sum(entry.stat().st_size for entry in self._entries())
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+            # Mise à jour du mtime pour l'éviction LRU
+            os.utime(path)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Dict):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        data = json.dumps(value).encode("utf-8")
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._ensure_total()
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._total_bytes += len(data) - previous
+                self._evict()
+            except OSError as e:
+                logger.warning(f"⚠️ Écriture du cache de résultats impossible : {e}")
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        # Ne jamais évincer l'entrée la plus récente, même si elle dépasse le budget seule
+        for entry in entries[:-1]:
+            if self._total_bytes <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "used_mb": round((self._total_bytes or 0) / 1024 / 1024, 1),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+RESULT_CACHE = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB * 1024 * 1024)
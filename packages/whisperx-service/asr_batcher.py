@@ -0,0 +1,157 @@
+"""
+📦 Cross-request batching of short transcriptions
+Mobile clients upload many 5-30 s clips. Transcribed one by one, each clip
+fills one slot of a batch_size=16 faster-whisper call and the rest of the
+batch is empty.
+
+Clips sent to /transcribe with the same model and language within a few
+milliseconds are laid end to end, separated by 30 s of silence, and
+transcribed in one `transcribe(..., batch_size=16)` call. WhisperX merges VAD
+regions into windows of at most 30 s, so the silence keeps every window
+inside a single clip; segments are then routed back to their clip and
+shifted to its own timeline.
+
+Auto-detected languages are not batched (whisperx detects one language per
+call), and neither are clips longer than ASR_BATCH_MAX_SECONDS.
+
+Configuration:
+- ASR_BATCH_MAX_REQUESTS: max clips per call (default: 16, 1 = no batching)
+- ASR_BATCH_WAIT_MS: how long to wait for more clips (default: 50)
+- ASR_BATCH_MAX_SECONDS: longest clip that is batched (default: 30)
+"""
+
+import os
+import time
+import asyncio
+import logging
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from inference_executor import run_inference
+from metrics import INFERENCE_CALL_LATENCY, Histogram
+
+logger = logging.getLogger(__name__)
+
+ASR_BATCH_MAX_REQUESTS = int(os.getenv("ASR_BATCH_MAX_REQUESTS", "16"))
+ASR_BATCH_WAIT_MS = float(os.getenv("ASR_BATCH_WAIT_MS", "50"))
+ASR_BATCH_MAX_SECONDS = float(os.getenv("ASR_BATCH_MAX_SECONDS", "30"))
+
+SAMPLE_RATE = 16000
+GAP_SECONDS = 30.0  # WhisperX chunk size: no VAD window can span two clips
+
+
+class ASRBatcher:
+    """Async front-end: `await transcribe(model, language, samples)`, batched per (model, language)"""
+
+    def __init__(self, load_model: Callable, max_requests: int, max_wait_ms: float, sample_rate: int = SAMPLE_RATE):
+        self.load_model = load_model
+        self.max_requests = max(1, max_requests)
+        self.max_wait = max_wait_ms / 1000.0
+        self.sample_rate = sample_rate
+        self._queues: Dict[Tuple[str, str], asyncio.Queue] = {}
+        self._tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.requests = 0
+        self.calls = 0
+        self.batch_size = Histogram([1, 2, 4, 8, 16, 32])
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_requests > 1
+
+    def accepts(self, language: Optional[str], duration: float) -> bool:
+        return self.enabled and bool(language) and duration <= ASR_BATCH_MAX_SECONDS
+
+    def _ensure_started(self, key: Tuple[str, str]):
+        task = self._tasks.get(key)
+        if task is None or task.done():
+            self._queues[key] = asyncio.Queue()
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    async def transcribe(self, model_name: str, language: str, samples: np.ndarray) -> dict:
+        """Raw Whisper segments of one clip -> {"segments", "language"}"""
+        key = (model_name, language)
+        self._ensure_started(key)
+        future = asyncio.get_running_loop().create_future()
+        await self._queues[key].put((samples, future))
+        return await future
+
+    async def _collect(self, queue: asyncio.Queue) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_requests:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self, key: Tuple[str, str]):
+        queue = self._queues[key]
+        while True:
+            batch = await self._collect(queue)
+            try:
+                results = await run_inference(self._forward, key[0], key[1], [samples for samples, _ in batch])
+            except Exception as e:
+                logger.error(f"❌ Batched transcription failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _forward(self, model_name: str, language: str, clips: List[np.ndarray]) -> List[dict]:
+        whisper_model = self.load_model(model_name)
+        gap = np.zeros(int(GAP_SECONDS * self.sample_rate), dtype=np.float32)
+        parts, offsets, position = [], [], 0
+        for i, clip in enumerate(clips):
+            if i:
+                parts.append(gap)
+                position += len(gap)
+            offsets.append(position / self.sample_rate)
+            parts.append(np.asarray(clip, dtype=np.float32))
+            position += len(clip)
+
+        call_start = time.perf_counter()
+        result = whisper_model.transcribe(
+            np.concatenate(parts) if len(parts) > 1 else parts[0],
+            language=language,
+            batch_size=16
+        )
+        INFERENCE_CALL_LATENCY.labels(model=f"whisper-{model_name}").observe(time.perf_counter() - call_start)
+        self.requests += len(clips)
+        self.calls += 1
+        self.batch_size.observe(len(clips))
+        if len(clips) > 1:
+            logger.info(f"📦 Transcribed {len(clips)} clips in one call")
+
+        # Route each segment to the clip its middle falls in
+        outputs = [{"segments": [], "language": result.get("language", language)} for _ in clips]
+        for seg in result["segments"]:
+            i = max(0, bisect_right(offsets, (seg["start"] + seg["end"]) / 2) - 1)
+            duration = len(clips[i]) / self.sample_rate
+            outputs[i]["segments"].append(dict(
+                seg,
+                start=min(max(seg["start"] - offsets[i], 0.0), duration),
+                end=min(max(seg["end"] - offsets[i], 0.0), duration)
+            ))
+        return outputs
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_requests": self.max_requests,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_seconds": ASR_BATCH_MAX_SECONDS,
+            "queued": sum(queue.qsize() for queue in self._queues.values()),
+            "requests": self.requests,
+            "model_calls": self.calls,
+            "batch_size": self.batch_size.snapshot(),
+        }
@@ -0,0 +1,116 @@
+"""
+🎚️ Audio decoding for WhisperX
+Decodes an uploaded file once into a 16 kHz mono float32 waveform that is
+shared by every pipeline stage (transcription, alignment, diarization).
+Without it, whisperx and pyannote each run ffmpeg on the same file.
+
+ffmpeg writes raw float32 samples to a temporary file. Short recordings are
+loaded into memory; long ones are memory-mapped so that the waveform does not
+have to be resident in RAM.
+
+Configuration:
+- DECODE_MMAP_MIN_SECONDS: duration above which the waveform is memory-mapped (default: 600)
+"""
+
+import os
+import time
+import logging
+import tempfile
+import subprocess
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+DECODE_MMAP_MIN_SECONDS = float(os.getenv("DECODE_MMAP_MIN_SECONDS", "600"))
+
+_BYTES_PER_SAMPLE = np.dtype(np.float32).itemsize
+
+
+class DecodedAudio:
+    """
+    Lazily decoded waveform of an audio file
+
+    Decoding happens on first access to `samples`, so a request whose stages
+    are all served from cache never runs ffmpeg. Call `close()` (or use as a
+    context manager) to release the memory map and its backing file.
+    """
+
+    def __init__(self, path: str, sample_rate: int = SAMPLE_RATE):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.decode_time = 0.0
+        self._samples: Optional[np.ndarray] = None
+        self._raw_path: Optional[str] = None
+
+    @property
+    def samples(self) -> np.ndarray:
+        if self._samples is None:
+            self._samples = self._decode()
+        return self._samples
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._samples is not None
+
+    def as_pyannote_input(self) -> dict:
+        """In-memory input accepted by pyannote pipelines"""
+        import torch
+        return {
+            "waveform": torch.from_numpy(self.samples).unsqueeze(0),
+            "sample_rate": self.sample_rate
+        }
+
+    def _decode(self) -> np.ndarray:
+        start = time.time()
+        fd, raw_path = tempfile.mkstemp(suffix=".f32")
+        os.close(fd)
+        cmd = [
+            "ffmpeg", "-nostdin", "-threads", "0",
+            "-i", self.path,
+            "-f", "f32le", "-ac", "1", "-ar", str(self.sample_rate),
+            "-y", raw_path
+        ]
+        try:
+            subprocess.run(cmd, capture_output=True, check=True)
+        except subprocess.CalledProcessError as e:
+            os.unlink(raw_path)
+            raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')[-500:]}") from e
+
+        num_samples = os.path.getsize(raw_path) // _BYTES_PER_SAMPLE
+        duration = num_samples / self.sample_rate
+        if num_samples == 0:
+            samples = np.zeros(0, dtype=np.float32)
+            os.unlink(raw_path)
+        elif duration >= DECODE_MMAP_MIN_SECONDS:
+            # Copy-on-write map: writable for torch, never modifies the file
+            samples = np.memmap(raw_path, dtype=np.float32, mode="c", shape=(num_samples,))
+            self._raw_path = raw_path
+        else:
+            samples = np.fromfile(raw_path, dtype=np.float32)
+            os.unlink(raw_path)
+
+        self.decode_time = time.time() - start
+        logger.info(
+            f"🎚️ Audio decoded in {self.decode_time:.2f}s "
+            f"({duration:.1f}s{', memory-mapped' if self._raw_path else ''})"
+        )
+        return samples
+
+    def close(self):
+        self._samples = None
+        if self._raw_path and os.path.exists(self._raw_path):
+            os.unlink(self._raw_path)
+        self._raw_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
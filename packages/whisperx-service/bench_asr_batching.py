@@ -0,0 +1,102 @@
+"""
+⏱️ Throughput benchmark: /transcribe on many concurrent short clips
+Sends the same WAV clip N times from C concurrent clients and prints
+requests/second. Every request gets a few extra silent samples so that its
+audio hash differs and the result cache never answers.
+
+Compare the service started with and without cross-request batching:
+    ASR_BATCH_MAX_REQUESTS=1  -> one faster-whisper call per clip (before)
+    ASR_BATCH_MAX_REQUESTS=16 -> clips batched together (default)
+
+Usage:
+    python bench_asr_batching.py clip.wav --requests 64 --concurrency 16 \\
+        --url http://localhost:8082 --model base --language fr
+"""
+
+import io
+import json
+import time
+import uuid
+import wave
+import argparse
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def unique_wav(frames: bytes, params, index: int) -> bytes:
+    """The clip followed by `index + 1` silent samples"""
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wav:
+        wav.setparams(params)
+        wav.writeframes(frames + b"\x00" * params.sampwidth * params.nchannels * (index + 1))
+    return out.getvalue()
+
+
+def post_clip(url: str, audio: bytes, fields: dict) -> dict:
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n".encode())
+    body.write(
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"clip.wav\"\r\n"
+        f"Content-Type: audio/wav\r\n\r\n".encode()
+    )
+    body.write(audio)
+    body.write(f"\r\n--{boundary}--\r\n".encode())
+    request = urllib.request.Request(
+        f"{url}/transcribe",
+        data=body.getvalue(),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    )
+    with urllib.request.urlopen(request, timeout=600) as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clip", help="Short WAV clip (5-30 s)")
+    parser.add_argument("--url", default="http://localhost:8082")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--language", default="fr")
+    args = parser.parse_args()
+
+    with wave.open(args.clip, "rb") as wav:
+        params = wav.getparams()
+        frames = wav.readframes(params.nframes)
+    clips = [unique_wav(frames, params, i) for i in range(args.requests)]
+    # No alignment: measure the transcription stage that batching changes
+    fields = {"model": args.model, "language": args.language, "alignment": "none"}
+
+    # Warm-up request: model load is not part of the measurement
+    post_clip(args.url, unique_wav(frames, params, args.requests), fields)
+
+    latencies = []
+
+    def run(audio: bytes):
+        start = time.perf_counter()
+        post_clip(args.url, audio, fields)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run, clips))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"📋 {args.requests} clips of {params.nframes / params.framerate:.1f}s, concurrency {args.concurrency}")
+    print(f"⚡ Throughput: {args.requests / elapsed:.2f} req/s")
+    print(f"⏱️ Latency p50 {latencies[len(latencies) // 2]:.2f}s, p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f}s")
+
+    try:
+        with urllib.request.urlopen(f"{args.url}/ready", timeout=30) as response:
+            ready = json.loads(response.read())
+    except urllib.error.HTTPError as e:  # 503 still carries the payload
+        ready = json.loads(e.read())
+    print(f"📦 Batcher: {ready.get('asr_batcher')}")
+
+
+if __name__ == "__main__":
+    main()
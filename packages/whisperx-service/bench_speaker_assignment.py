@@ -0,0 +1,94 @@
+"""
+⏱️ Microbenchmark: speaker_assignment vs whisperx.assign_word_speakers
+Builds a synthetic meeting transcript (words, segments, overlapping
+diarization turns), labels it with both implementations, checks that they
+agree and prints the timings.
+
+Usage (inside the whisperx container):
+    python bench_speaker_assignment.py --hours 3
+    python bench_speaker_assignment.py --hours 3 --skip-whisperx  # ours only
+"""
+
+import copy
+import time
+import random
+import argparse
+from typing import List, Tuple
+
+from speaker_assignment import assign_word_speakers
+
+
+def synthetic_meeting(hours: float, speakers: int = 6, seed: int = 0) -> Tuple[List[dict], dict]:
+    """(turns, aligned transcript) of a meeting of `hours` hours"""
+    rng = random.Random(seed)
+    duration = hours * 3600
+
+    # Turns of 1-20 s, 10% of them overlapping the previous one
+    turns, t = [], 0.0
+    while t < duration:
+        length = rng.uniform(1.0, 20.0)
+        start = t - rng.uniform(0.2, 1.5) if turns and rng.random() < 0.1 else t
+        turns.append({"start": max(0.0, start), "end": start + length, "speaker": f"SPEAKER_{rng.randrange(speakers):02d}"})
+        t = start + length + rng.uniform(0.0, 1.0)
+
+    # ~2.5 words/s, 8-20 words per segment
+    segments, t = [], 0.0
+    while t < duration:
+        words = []
+        for _ in range(rng.randint(8, 20)):
+            length = rng.uniform(0.15, 0.6)
+            words.append({"word": "mot", "start": round(t, 3), "end": round(t + length, 3), "score": 0.9})
+            t += length + rng.uniform(0.0, 0.2)
+        segments.append({"start": words[0]["start"], "end": words[-1]["end"], "text": "...", "words": words})
+        t += rng.uniform(0.2, 2.0)
+    return turns, {"segments": segments}
+
+
+def labels(transcript: dict) -> List:
+    return [
+        (seg.get("speaker"), [word.get("speaker") for word in seg["words"]])
+        for seg in transcript["segments"]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-whisperx", action="store_true", help="Only time speaker_assignment")
+    args = parser.parse_args()
+
+    turns, transcript = synthetic_meeting(args.hours, seed=args.seed)
+    words = sum(len(seg["words"]) for seg in transcript["segments"])
+    print(f"📋 {args.hours} h: {len(turns)} turns, {len(transcript['segments'])} segments, {words} words")
+
+    ours = copy.deepcopy(transcript)
+    start = time.perf_counter()
+    assign_word_speakers(turns, ours)
+    ours_time = time.perf_counter() - start
+    print(f"⚡ speaker_assignment:            {ours_time:8.3f} s")
+
+    if args.skip_whisperx:
+        return
+
+    import pandas as pd
+    import whisperx
+
+    reference = copy.deepcopy(transcript)
+    start = time.perf_counter()
+    whisperx.assign_word_speakers(pd.DataFrame(turns, columns=["start", "end", "speaker"]), reference)
+    reference_time = time.perf_counter() - start
+    print(f"🐢 whisperx.assign_word_speakers: {reference_time:8.3f} s  ({reference_time / ours_time:.0f}x slower)")
+
+    # Ties between two speakers with the exact same overlap may resolve differently
+    ours_labels, reference_labels = labels(ours), labels(reference)
+    total = sum(1 + len(w) for _, w in ours_labels)
+    same = sum(
+        (a == b) + sum(x == y for x, y in zip(wa, wb))
+        for (a, wa), (b, wb) in zip(ours_labels, reference_labels)
+    )
+    print(f"✅ Same label on {same}/{total} segments+words")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+🧠 Micro-batched speaker embeddings
+Gathers speech segments from every open live session for a few
+milliseconds and runs them through WeSpeakerResNet34 in one forward pass,
+instead of one batch-of-1 call per segment.
+
+Segments are bucketed by duration so that padding stays small, and a frame
+mask (`weights`) keeps the padded tail out of the statistics pooling.
+
+Configuration:
+- EMBEDDING_BATCH_MAX_SIZE: max segments per forward pass (default: 32)
+- EMBEDDING_BATCH_WAIT_MS: how long to wait for more segments (default: 30)
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from metrics import INFERENCE_CALL_LATENCY, Histogram
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "30"))
+
+SAMPLE_RATE = 16000
+BUCKET_SECONDS = 0.5     # Max length difference inside one padded batch
+MASK_HOP_SAMPLES = 160   # Frame mask resolution (10 ms)
+
+
+class EmbeddingBatcher:
+    """Async front-end: `await embed(audio)` from any session, batched behind the scenes"""
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float, sample_rate: int = SAMPLE_RATE):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.bucket_samples = int(BUCKET_SECONDS * sample_rate)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Dedicated thread: live sessions never wait behind long batch transcriptions
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self.batch_size = Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.latency = Histogram([0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5])
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def embed(self, audio: np.ndarray) -> Optional[np.ndarray]:
+        """Speaker embedding of one speech segment (None on failure)"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        # Copy: the caller's array may be a view on a ring buffer
+        await self._queue.put((np.array(audio, dtype=np.float32), future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future, float]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            try:
+                embeddings = await loop.run_in_executor(
+                    self._executor, self._forward, [audio for audio, _, _ in batch]
+                )
+            except Exception as e:
+                logger.error(f"❌ Batched embedding extraction failed: {e}")
+                embeddings = [None] * len(batch)
+
+            now = time.perf_counter()
+            for (_, future, enqueued), embedding in zip(batch, embeddings):
+                self.latency.observe(now - enqueued)
+                if not future.done():
+                    future.set_result(embedding)
+
+    def _buckets(self, audios: List[np.ndarray]) -> List[List[int]]:
+        """Group segment indices so that lengths in a group differ by < BUCKET_SECONDS"""
+        order = sorted(range(len(audios)), key=lambda i: len(audios[i]))
+        buckets: List[List[int]] = []
+        for i in order:
+            if buckets and len(audios[i]) - len(audios[buckets[-1][0]]) < self.bucket_samples:
+                buckets[-1].append(i)
+            else:
+                buckets.append([i])
+        return buckets
+
+    def _forward(self, audios: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        from live_diarization import DEVICE, get_embedding_model
+
+        model = get_embedding_model()
+        results: List[Optional[np.ndarray]] = [None] * len(audios)
+
+        for bucket in self._buckets(audios):
+            max_len = max(len(audios[i]) for i in bucket)
+            waveforms = torch.zeros(len(bucket), 1, max_len)
+            weights = torch.zeros(len(bucket), max(1, max_len // MASK_HOP_SAMPLES))
+            for row, i in enumerate(bucket):
+                waveforms[row, 0, :len(audios[i])] = torch.from_numpy(audios[i])
+                weights[row, :max(1, len(audios[i]) // MASK_HOP_SAMPLES)] = 1.0
+
+            call_start = time.perf_counter()
+            with torch.no_grad():
+                embeddings = model(waveforms.to(DEVICE), weights=weights.to(DEVICE))
+            embeddings = embeddings.cpu().numpy()
+            INFERENCE_CALL_LATENCY.labels(model="wespeaker-resnet34").observe(time.perf_counter() - call_start)
+
+            for row, i in enumerate(bucket):
+                results[i] = embeddings[row].flatten()
+            self.batch_size.observe(len(bucket))
+
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_size.snapshot(),
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+EMBEDDING_BATCHER = EmbeddingBatcher(EMBEDDING_BATCH_MAX_SIZE, EMBEDDING_BATCH_WAIT_MS)
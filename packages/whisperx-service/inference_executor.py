@@ -0,0 +1,108 @@
+"""
+🧵 Inference executor for WhisperX
+Runs blocking model calls (transcribe, align, diarization) on a bounded
+thread pool so the asyncio event loop keeps serving /health, SSE streams
+and WebSockets while a long upload is being processed.
+
+Usage:
+    result = await run_inference(whisper_model.transcribe, audio_path, batch_size=16)
+
+Configuration:
+- INFERENCE_WORKERS: number of worker threads (default: 1)
+  Calls on one ASR model still run one at a time (see model_cache.SerializedModel);
+  extra workers let other models, alignment and diarization run alongside.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+
+
+class InferenceExecutor:
+    """Bounded thread pool with queue-depth and in-flight counters"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="inference"
+        )
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self._shutdown = False
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on a worker thread and await its result"""
+        with self._lock:
+            self.queued += 1
+        dequeued = [False]  # Set once the job left the queue (started or cancelled)
+
+        def leave_queue():
+            with self._lock:
+                if dequeued[0]:
+                    return
+                dequeued[0] = True
+                self.queued -= 1
+
+        def job():
+            leave_queue()
+            with self._lock:
+                self.in_flight += 1
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                with self._lock:
+                    self.in_flight -= 1
+                    self.failed += 1
+                raise
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+            return result
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, job)
+        # Cancelled before a worker picked it up (caller cancel, shutdown): job() never runs
+        future.add_done_callback(lambda _: leave_queue())
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # The job keeps running on its thread; only the awaiting side is gone
+            logger.warning("⚠️ Inference call cancelled by caller")
+            raise
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    @property
+    def is_shutdown(self) -> bool:
+        return self._shutdown
+
+    def shutdown(self):
+        self._shutdown = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+INFERENCE_EXECUTOR = InferenceExecutor(INFERENCE_WORKERS)
+
+
+async def run_inference(fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking model call on the shared inference executor"""
+    return await INFERENCE_EXECUTOR.run(fn, *args, **kwargs)
@@ -0,0 +1,313 @@
+"""
+📋 Asynchronous transcription jobs for WhisperX
+Persistent job queue backed by SQLite, for long recordings that would
+otherwise hit proxy timeouts on /transcribe.
+
+Flow:
+1. POST /jobs stores the upload on disk and inserts a `queued` job
+2. Workers claim jobs by priority (highest first, then oldest) and run the
+   transcription pipeline on the inference executor
+3. GET /jobs/{id} returns the status, GET /jobs/{id}/result the payload
+4. Finished jobs (and their audio) are purged after the retention period
+
+Jobs survive restarts: anything left `running` by a crash is re-queued.
+
+Configuration:
+- JOBS_DIR: database + uploaded audio (default: /app/data/jobs)
+- JOBS_WORKERS: number of concurrent job workers (default: 1)
+- JOBS_RETENTION_HOURS: how long finished jobs are kept (default: 24)
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from inference_executor import run_inference
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.getenv("JOBS_DIR", "/app/data/jobs")
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "1"))
+JOBS_RETENTION_HOURS = float(os.getenv("JOBS_RETENTION_HOURS", "24"))
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    params TEXT NOT NULL,
+    audio_path TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, created_at);
+"""
+
+
+class JobQueueUnavailable(RuntimeError):
+    """The job database is not open (start() failed or the queue is stopped)"""
+
+
+class JobQueue:
+    """
+    SQLite-backed priority queue with asyncio workers
+
+    - runner: blocking callable(audio_path, **params) -> result dict,
+      executed through the shared inference executor
+    """
+
+    def __init__(
+        self,
+        jobs_dir: str,
+        runner: Callable[..., Dict],
+        workers: int = 1,
+        retention_seconds: float = 24 * 3600,
+    ):
+        self.jobs_dir = jobs_dir
+        self.audio_dir = os.path.join(jobs_dir, "audio")
+        self.db_path = os.path.join(jobs_dir, "jobs.db")
+        self._runner = runner
+        self.workers = max(1, workers)
+        self.retention_seconds = retention_seconds
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    # ── Storage ──────────────────────────────────────────────────────────
+
+    def _connect(self):
+        os.makedirs(self.audio_dir, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def _execute(self, sql: str, args: tuple = ()) -> sqlite3.Cursor:
+        with self._db_lock:
+            if self._db is None:
+                raise JobQueueUnavailable("Job queue is not running")
+            return self._db.execute(sql, args)
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row, include_result: bool = False) -> Dict:
+        job = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "priority": row["priority"],
+            "params": json.loads(row["params"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "error": row["error"],
+        }
+        if include_result:
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    def new_audio_path(self, suffix: str = "") -> str:
+        """Path where the upload of a new job should be written"""
+        os.makedirs(self.audio_dir, exist_ok=True)
+        return os.path.join(self.audio_dir, f"{uuid.uuid4().hex}{suffix}")
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    def submit(self, audio_path: str, params: Dict, priority: int = 0) -> Dict:
+        """Queue a job for an audio file already stored under audio_dir"""
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, status, priority, params, audio_path, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, priority, json.dumps(params), audio_path, time.time())
+        )
+        logger.info(f"📋 Job queued: {job_id} (priority={priority})")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str, include_result: bool = False) -> Optional[Dict]:
+        row = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = self._row_to_job(row, include_result=include_result)
+        if job["status"] == QUEUED:
+            job["queue_position"] = self._queue_position(row)
+        return job
+
+    def _queue_position(self, row: sqlite3.Row) -> int:
+        ahead = self._execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = ? AND "
+            "(priority > ? OR (priority = ? AND created_at < ?))",
+            (QUEUED, row["priority"], row["priority"], row["created_at"])
+        ).fetchone()[0]
+        return ahead + 1
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """
+        Cancel a job. Queued jobs are cancelled at once; running jobs are
+        flagged and their result is discarded when inference returns.
+        """
+        row = self._execute("SELECT audio_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        # Conditional updates: a worker may claim the job between two statements
+        cancelled = self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, audio_path = NULL WHERE id = ? AND status = ?",
+            (CANCELLED, time.time(), job_id, QUEUED)
+        ).rowcount
+        if cancelled:
+            if row["audio_path"] and os.path.exists(row["audio_path"]):
+                os.unlink(row["audio_path"])
+            logger.info(f"🛑 Job cancelled: {job_id}")
+        elif self._execute(
+            "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+            (job_id, RUNNING)
+        ).rowcount:
+            logger.info(f"🛑 Cancellation requested for running job: {job_id}")
+        return self.get(job_id)
+
+    def stats(self) -> Dict:
+        if self._db is None:
+            return {"available": False, "workers": self.workers}
+        rows = self._execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {row["status"]: row["n"] for row in rows}
+        return {
+            "available": True,
+            "workers": self.workers,
+            "retention_hours": round(self.retention_seconds / 3600, 2),
+            **{state: counts.get(state, 0) for state in (QUEUED, RUNNING) + FINISHED_STATES},
+        }
+
+    # ── Workers ──────────────────────────────────────────────────────────
+
+    @property
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self):
+        """Open the database, re-queue interrupted jobs and start workers"""
+        self._connect()
+        recovered = self._execute(
+            "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+            (QUEUED, RUNNING)
+        ).rowcount
+        if recovered:
+            logger.info(f"♻️ Re-queued {recovered} interrupted job(s)")
+
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._purge_loop()))
+        logger.info(f"✅ Job queue started: {self.workers} worker(s), db={self.db_path}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _claim_next(self) -> Optional[sqlite3.Row]:
+        """Atomically move the best queued job to `running`"""
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE status = ? "
+                    "ORDER BY priority DESC, created_at ASC LIMIT 1",
+                    (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                        (RUNNING, time.time(), row["id"])
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return row
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None):
+        row = self._execute("SELECT audio_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ?, audio_path = NULL "
+            "WHERE id = ?",
+            (status, time.time(), json.dumps(result) if result is not None else None, error, job_id)
+        )
+        # Audio is no longer needed once the job has reached a final state
+        if row is not None and row["audio_path"] and os.path.exists(row["audio_path"]):
+            os.unlink(row["audio_path"])
+
+    async def _worker(self, index: int):
+        while True:
+            row = self._claim_next()
+            if row is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=5.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id = row["id"]
+            params = json.loads(row["params"])
+            logger.info(f"▶️ Worker {index} running job {job_id}")
+            start = time.time()
+            try:
+                result = await run_inference(self._runner, row["audio_path"], **params)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Job {job_id} failed: {e}")
+                self._finish(job_id, FAILED, error=str(e))
+                continue
+
+            cancel_requested = self._execute(
+                "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()["cancel_requested"]
+            if cancel_requested:
+                logger.info(f"🛑 Job {job_id} finished after cancellation, result discarded")
+                self._finish(job_id, CANCELLED)
+            else:
+                self._finish(job_id, COMPLETED, result=result)
+                logger.info(f"✅ Job {job_id} completed in {time.time() - start:.2f}s")
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention_seconds
+        placeholders = ",".join("?" for _ in FINISHED_STATES)
+        deleted = self._execute(
+            f"DELETE FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+            (*FINISHED_STATES, cutoff)
+        ).rowcount
+        if deleted:
+            logger.info(f"🗑️ Purged {deleted} expired job(s)")
+        return deleted
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                self.purge_expired()
+            except Exception as e:
+                logger.warning(f"⚠️ Job purge failed: {e}")
+            await asyncio.sleep(600)
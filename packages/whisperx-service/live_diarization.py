@@ -23,13 +23,17 @@ import asyncio
 import logging
 import tempfile
 import numpy as np
+from collections import deque
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 
 import torch
 import torchaudio
 from fastapi import WebSocket, WebSocketDisconnect
-from scipy.spatial.distance import cosine
+
+from embedding_batcher import EMBEDDING_BATCHER
+from voiceprints import VOICEPRINTS, VoiceprintStore, VoiceprintStoreUnavailable
+from live_vad import LIVE_VAD, VADStream
 
 # Note: torch.load is patched in server.py to fix PyTorch 2.6+ weights_only issue
 
@@ -41,6 +45,11 @@ logger = logging.getLogger(__name__)
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 HUGGINGFACE_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
 
+# Load shedding
+LIVE_MAX_SESSIONS = int(os.getenv("LIVE_MAX_SESSIONS", "16"))           # Per process
+LIVE_LAG_BUDGET_SECONDS = float(os.getenv("LIVE_LAG_BUDGET_SECONDS", "4"))  # Unprocessed audio per socket
+LIVE_INBOX_MAX_MESSAGES = int(os.getenv("LIVE_INBOX_MAX_MESSAGES", "256"))
+
 # Models (lazy loaded)
 _vad_model = None
 _vad_utils = None  # Silero VAD utilities
@@ -53,20 +62,206 @@ class SpeakerProfile:
     id: str
     embeddings: List[np.ndarray] = field(default_factory=list)
     avg_embedding: Optional[np.ndarray] = None
+    embedding_sum: Optional[np.ndarray] = None
+    max_embeddings: int = 10  # Keep last 10 embeddings
     
     def add_embedding(self, embedding: np.ndarray):
-        """Add new embedding and update average"""
+        """Add new embedding and update average (running sum over the window)"""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        if self.embedding_sum is None:
+            self.embedding_sum = np.zeros_like(embedding)
         self.embeddings.append(embedding)
-        if len(self.embeddings) > 10:  # Keep last 10 embeddings
-            self.embeddings = self.embeddings[-10:]
-        self.avg_embedding = np.mean(self.embeddings, axis=0)
+        self.embedding_sum += embedding
+        if len(self.embeddings) > self.max_embeddings:
+            self.embedding_sum -= self.embeddings.pop(0)
+        self.avg_embedding = self.embedding_sum / len(self.embeddings)
+
+
+class AudioRingBuffer:
+    """
+    Preallocated float32 ring buffer for incoming PCM audio
+    
+    Every sample is written twice (at i and i + capacity), so any window of
+    up to `capacity` samples is a contiguous slice of the backing array and
+    can be returned as a view without copying. int16 PCM is converted to
+    float32 in place, straight into the buffer.
+    If the reader falls behind by more than `capacity`, the oldest samples
+    are dropped.
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity * 2, dtype=np.float32)
+        self._written = 0  # Total samples written
+        self._read = 0     # Total samples consumed
+        self.dropped = 0
+    
+    @property
+    def available(self) -> int:
+        return self._written - self._read
+    
+    @property
+    def position(self) -> int:
+        """Absolute index (in the stream) of the next unread sample"""
+        return self._read
+    
+    def write_pcm16(self, data: bytes):
+        """Append 16-bit PCM bytes, converted to float32 in [-1, 1]"""
+        pcm = np.frombuffer(data, dtype=np.int16, count=len(data) // 2)
+        if len(pcm) > self.capacity:
+            # Only the last `capacity` samples can be kept (counted as dropped below)
+            self._written += len(pcm) - self.capacity
+            pcm = pcm[-self.capacity:]
+        
+        offset = 0
+        while offset < len(pcm):
+            index = self._written % self.capacity
+            count = min(len(pcm) - offset, self.capacity - index)
+            for start in (index, index + self.capacity):
+                target = self._buffer[start:start + count]
+                target[:] = pcm[offset:offset + count]
+                target *= 1.0 / 32768.0
+            self._written += count
+            offset += count
+        
+        overflow = self.available - self.capacity
+        if overflow > 0:
+            self._read += overflow
+            self.dropped += overflow
+    
+    def latest(self, num_samples: int) -> np.ndarray:
+        """View of the last num_samples written samples (num_samples <= capacity)"""
+        start = (self._written - num_samples) % self.capacity
+        return self._buffer[start:start + num_samples]
+    
+    def window(self, num_samples: int) -> np.ndarray:
+        """View of the next num_samples unread samples (num_samples <= capacity)"""
+        start = self._read % self.capacity
+        return self._buffer[start:start + num_samples]
+    
+    def consume(self, num_samples: int):
+        self._read += min(num_samples, self.available)
+
+
+class LiveInbox:
+    """
+    Bounded inbound queue of one live socket
+    
+    A receiver task fills it while the session processes audio, so a slow
+    node sees its backlog instead of letting websocket frames pile up. Once
+    the queued audio exceeds the lag budget, the oldest audio messages are
+    dropped (control messages are always kept).
+    """
+    
+    def __init__(self, sample_rate: int, lag_budget_seconds: float, max_messages: int):
+        self.sample_rate = sample_rate
+        self.budget_samples = int(lag_budget_seconds * sample_rate)
+        self.max_messages = max_messages
+        self._items: deque = deque()
+        self._ready = asyncio.Event()
+        self.queued_samples = 0
+        self.dropped_samples = 0
+        self.unreported_drops = 0  # Dropped since the last `lagging` event
+    
+    @staticmethod
+    def _samples(message: dict) -> int:
+        return len(message.get("bytes") or b"") // 2
+    
+    @property
+    def lag_seconds(self) -> float:
+        return self.queued_samples / self.sample_rate
+    
+    def put(self, message: dict):
+        self._items.append(message)
+        self.queued_samples += self._samples(message)
+        while self.queued_samples > self.budget_samples or len(self._items) > self.max_messages:
+            if not self._drop_oldest_audio():
+                break
+        self._ready.set()
+    
+    def _drop_oldest_audio(self) -> bool:
+        for index, message in enumerate(self._items):
+            samples = self._samples(message)
+            if samples:
+                del self._items[index]
+                self.queued_samples -= samples
+                self.dropped_samples += samples
+                self.unreported_drops += samples
+                return True
+        return False
+    
+    async def get(self) -> dict:
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        message = self._items.popleft()
+        self.queued_samples -= self._samples(message)
+        return message
+
+
+class LiveSessionLimiter:
+    """Admission control: max concurrent live sockets in this process"""
+    
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self.active = 0
+        self.rejected = 0
+    
+    def try_acquire(self) -> bool:
+        if self.active >= self.max_sessions:
+            self.rejected += 1
+            return False
+        self.active += 1
+        return True
+    
+    def release(self):
+        self.active = max(0, self.active - 1)
+    
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "max": self.max_sessions,
+            "rejected": self.rejected,
+            "available": max(0, self.max_sessions - self.active)
+        }
+
+
+LIVE_SESSIONS = LiveSessionLimiter(LIVE_MAX_SESSIONS)
+
+
+async def reject_if_full(websocket: WebSocket) -> bool:
+    """Refuse the socket (close code 1013, try again later) when the process is full"""
+    if LIVE_SESSIONS.try_acquire():
+        return False
+    logger.warning(f"⚠️ Live session refused: {LIVE_SESSIONS.active}/{LIVE_SESSIONS.max_sessions} active")
+    await websocket.accept()
+    await websocket.send_json({
+        "type": "error",
+        "message": "Too many live sessions, try again later"
+    })
+    await websocket.close(code=1013)
+    return True
+
+
+async def _receive_into(websocket: WebSocket, inbox: LiveInbox):
+    """Receiver task: websocket -> inbox, until the client goes away"""
+    try:
+        while True:
+            data = await websocket.receive()
+            inbox.put(data)
+            if data.get("type") == "websocket.disconnect":
+                return
+    except Exception:
+        inbox.put({"type": "websocket.disconnect"})
 
 
 class LiveDiarizationSession:
     """Manages a live diarization session"""
     
-    def __init__(self, sample_rate: int = 16000):
+    def __init__(self, sample_rate: int = 16000, voiceprints: Optional[VoiceprintStore] = None):
         self.sample_rate = sample_rate
+        # Enrolled voiceprints: new clusters take the name of a matching voice
+        self.voiceprints = voiceprints
         self.speakers: Dict[str, SpeakerProfile] = {}
         self.current_speaker: Optional[str] = None
         self.speaker_count = 0
@@ -77,6 +272,104 @@ class LiveDiarizationSession:
         self.pending_speaker: Optional[str] = None
         self.pending_count = 0
         self.min_changes_for_new_speaker = 2  # Require 2 consecutive different embeddings
+        # L2-normalized speaker centroids, one row per speaker (row order = _speaker_ids)
+        self._centroids: Optional[np.ndarray] = None
+        self._speaker_ids: List[str] = []
+        self._speaker_rows: Dict[str, int] = {}
+    
+    def _add_speaker(self, speaker_id: str, embedding: np.ndarray):
+        """Create a speaker profile and its centroid row"""
+        self.speakers[speaker_id] = SpeakerProfile(id=speaker_id)
+        dim = np.asarray(embedding).size
+        if self._centroids is None:
+            self._centroids = np.zeros((8, dim), dtype=np.float32)
+        elif len(self._speaker_ids) == len(self._centroids):
+            # Grow by doubling: rows stay contiguous, amortized O(1) per speaker
+            grown = np.zeros((len(self._centroids) * 2, dim), dtype=np.float32)
+            grown[:len(self._centroids)] = self._centroids
+            self._centroids = grown
+        self._speaker_rows[speaker_id] = len(self._speaker_ids)
+        self._speaker_ids.append(speaker_id)
+        self._update_speaker(speaker_id, embedding)
+    
+    def _update_speaker(self, speaker_id: str, embedding: np.ndarray):
+        """Add an embedding to a speaker and refresh its normalized centroid"""
+        profile = self.speakers[speaker_id]
+        profile.add_embedding(embedding)
+        norm = np.linalg.norm(profile.avg_embedding)
+        row = self._speaker_rows[speaker_id]
+        self._centroids[row] = profile.avg_embedding / norm if norm > 0 else 0.0
+    
+    def seed(self, names: List[str]) -> List[str]:
+        """Pre-create named clusters from enrolled voiceprints; returns the seeded names"""
+        if self.voiceprints is None:
+            return []
+        seeded = []
+        for name, embedding in self.voiceprints.embeddings(names).items():
+            if name not in self.speakers:
+                self._add_speaker(name, embedding)
+                seeded.append(name)
+        return seeded
+    
+    def rename_speaker(self, old_id: str, new_id: str):
+        """Relabel a cluster (e.g. after enrolling it under a real name)"""
+        if old_id == new_id or old_id not in self.speakers:
+            return
+        if new_id in self.speakers:
+            # Name already used in this session: merge the cluster into it
+            for embedding in self.speakers[old_id].embeddings:
+                self._update_speaker(new_id, embedding)
+            row = self._speaker_rows.pop(old_id)
+            del self.speakers[old_id]
+            last = len(self._speaker_ids) - 1
+            if row != last:
+                moved = self._speaker_ids[last]
+                self._centroids[row] = self._centroids[last]
+                self._speaker_ids[row] = moved
+                self._speaker_rows[moved] = row
+            self._speaker_ids.pop()
+        else:
+            profile = self.speakers.pop(old_id)
+            profile.id = new_id
+            self.speakers[new_id] = profile
+            row = self._speaker_rows.pop(old_id)
+            self._speaker_rows[new_id] = row
+            self._speaker_ids[row] = new_id
+        if self.current_speaker == old_id:
+            self.current_speaker = new_id
+    
+    def _create_speaker(self, embedding: np.ndarray) -> Tuple[str, bool]:
+        """
+        New cluster, named after the matching enrolled voiceprint if any
+        Returns: (speaker_id, is_new) - is_new is False when the voiceprint
+        name already has a cluster in this session (embedding merged into it)
+        """
+        name = None
+        if self.voiceprints is not None:
+            name, _ = self.voiceprints.identify(embedding)
+        if name is not None and name in self.speakers:
+            self._update_speaker(name, embedding)
+            return name, False
+        if name is None:
+            self.speaker_count += 1
+            name = f"SPEAKER_{self.speaker_count:02d}"
+        self._add_speaker(name, embedding)
+        return name, True
+    
+    def best_match(self, embedding: np.ndarray) -> Tuple[Optional[str], float]:
+        """
+        Closest speaker by cosine distance: one matrix-vector product + argmax
+        Returns: (speaker_id, distance) or (None, inf) without speakers
+        """
+        if not self._speaker_ids:
+            return None, float('inf')
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None, float('inf')
+        similarities = self._centroids[:len(self._speaker_ids)] @ (query / norm)
+        row = int(np.argmax(similarities))
+        return self._speaker_ids[row], 1.0 - float(similarities[row])
         
     def get_or_create_speaker(self, embedding: np.ndarray) -> Tuple[str, float, bool]:
         """
@@ -85,24 +378,12 @@ class LiveDiarizationSession:
         """
         if len(self.speakers) == 0:
             # First speaker
-            speaker_id = "SPEAKER_01"
-            self.speaker_count = 1
-            self.speakers[speaker_id] = SpeakerProfile(id=speaker_id)
-            self.speakers[speaker_id].add_embedding(embedding)
+            speaker_id, is_new = self._create_speaker(embedding)
             # NOTE: Don't set current_speaker here - let WebSocket handler do it after sending
-            return speaker_id, 1.0, True
+            return speaker_id, 1.0, is_new
         
         # Compare with existing speakers
-        best_match = None
-        best_distance = float('inf')
-        
-        for speaker_id, profile in self.speakers.items():
-            if profile.avg_embedding is not None:
-                distance = cosine(embedding, profile.avg_embedding)
-                logger.debug(f"📏 Distance to {speaker_id}: {distance:.3f}")
-                if distance < best_distance:
-                    best_distance = distance
-                    best_match = speaker_id
+        best_match, best_distance = self.best_match(embedding)
         
         logger.debug(f"📊 Best match: {best_match} (distance: {best_distance:.3f}, threshold: {self.embedding_threshold})")
         
@@ -110,7 +391,7 @@ class LiveDiarizationSession:
         if best_distance < self.embedding_threshold:
             # Same speaker - update profile
             confidence = 1.0 - best_distance
-            self.speakers[best_match].add_embedding(embedding)
+            self._update_speaker(best_match, embedding)
             # Reset pending speaker tracking
             self.pending_speaker = None
             self.pending_count = 0
@@ -131,29 +412,23 @@ class LiveDiarizationSession:
             
             # Only create new speaker if we have enough consistent detections
             if self.pending_count >= self.min_changes_for_new_speaker:
-                self.speaker_count += 1
-                speaker_id = f"SPEAKER_{self.speaker_count:02d}"
-                self.speakers[speaker_id] = SpeakerProfile(id=speaker_id)
-                self.speakers[speaker_id].add_embedding(embedding)
+                speaker_id, is_new = self._create_speaker(embedding)
                 confidence = 1.0 - best_distance if best_distance < 1.0 else 0.5
                 self.pending_speaker = None
                 self.pending_count = 0
-                return speaker_id, confidence, True
+                return speaker_id, confidence, is_new
             else:
                 # Not enough consistency - stick with current speaker or best match
                 if self.current_speaker and self.current_speaker in self.speakers:
-                    self.speakers[self.current_speaker].add_embedding(embedding)
+                    self._update_speaker(self.current_speaker, embedding)
                     return self.current_speaker, 1.0 - best_distance, False
                 elif best_match:
-                    self.speakers[best_match].add_embedding(embedding)
+                    self._update_speaker(best_match, embedding)
                     return best_match, 1.0 - best_distance, False
                 else:
                     # Fallback: create first speaker
-                    speaker_id = "SPEAKER_01"
-                    self.speaker_count = 1
-                    self.speakers[speaker_id] = SpeakerProfile(id=speaker_id)
-                    self.speakers[speaker_id].add_embedding(embedding)
-                    return speaker_id, 0.5, True
+                    speaker_id, is_new = self._create_speaker(embedding)
+                    return speaker_id, 0.5, is_new
 
 
 def get_vad_model():
@@ -278,6 +553,78 @@ def detect_speech(audio: np.ndarray, sample_rate: int = 16000) -> List[Tuple[flo
         return []
 
 
+async def send_speaker_update(
+    websocket: WebSocket,
+    session: LiveDiarizationSession,
+    speaker_id: str,
+    confidence: float,
+    is_new: bool
+):
+    """Send a speaker / speaker_change event if the active speaker changed"""
+    if speaker_id == session.current_speaker:
+        return
+    
+    logger.info(f"📤 SENDING speaker update: {speaker_id} (current was: {session.current_speaker})")
+    if session.current_speaker:
+        msg = {
+            "type": "speaker_change",
+            "from": session.current_speaker,
+            "to": speaker_id,
+            "confidence": round(confidence, 2),
+            "is_new": is_new
+        }
+    else:
+        msg = {
+            "type": "speaker",
+            "speaker": speaker_id,
+            "confidence": round(confidence, 2),
+            "is_new": is_new
+        }
+    logger.info(f"📤 WebSocket SEND: {msg}")
+    await websocket.send_json(msg)
+    
+    session.current_speaker = speaker_id
+    logger.info(f"🎤 Speaker: {speaker_id} (confidence: {confidence:.2f}, new: {is_new})")
+
+
+def seed_from_query(websocket: WebSocket, session: LiveDiarizationSession) -> List[str]:
+    """Seed session clusters from `?speakers=Alice,Bob` (enrolled voiceprint names)"""
+    names = [n.strip() for n in websocket.query_params.get("speakers", "").split(",") if n.strip()]
+    seeded = session.seed(names) if names else []
+    if seeded:
+        logger.info(f"🗂️ Session seeded with voiceprints: {', '.join(seeded)}")
+    return seeded
+
+
+async def handle_enroll_message(websocket: WebSocket, session: LiveDiarizationSession, msg: dict):
+    """
+    {"type": "enroll", "speaker": "SPEAKER_02", "name": "Alice"}
+    Save the speaker profile as a named voiceprint and relabel it in the session
+    """
+    speaker_id = msg.get("speaker") or session.current_speaker
+    name = (msg.get("name") or "").strip()
+    profile = session.speakers.get(speaker_id)
+    if not name or profile is None or profile.avg_embedding is None:
+        await websocket.send_json({
+            "type": "error",
+            "message": f"Cannot enroll speaker {speaker_id!r} as {name!r}"
+        })
+        return
+    
+    try:
+        voiceprint = await asyncio.to_thread(VOICEPRINTS.enroll, name, profile.avg_embedding)
+    except VoiceprintStoreUnavailable as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        return
+    session.rename_speaker(speaker_id, name)
+    await websocket.send_json({
+        "type": "enrolled",
+        "speaker": speaker_id,
+        "name": name,
+        "voiceprint_id": voiceprint["id"]
+    })
+
+
 async def handle_live_diarization(websocket: WebSocket):
     """
     Handle WebSocket connection for live diarization
@@ -287,46 +634,100 @@ async def handle_live_diarization(websocket: WebSocket):
     - Server sends: JSON messages with speaker info
       {"type": "speaker", "speaker": "SPEAKER_01", "confidence": 0.92}
       {"type": "speaker_change", "from": "SPEAKER_01", "to": "SPEAKER_02"}
+      {"type": "lagging", "mode": "coarse" | "dropping", "lag_seconds": 3.1, ...}
+    - Client may send: {"type": "enroll", "speaker": "SPEAKER_02", "name": "Alice"}
+    
+    Speakers matching an enrolled voiceprint are reported by name;
+    `?speakers=Alice,Bob` pre-seeds the session with those voiceprints.
     """
+    if await reject_if_full(websocket):
+        return
+    # Everything after the slot is taken runs under the finally that frees it
+    try:
+        await _serve_live_diarization(websocket)
+    finally:
+        LIVE_SESSIONS.release()
+
+
+async def _serve_live_diarization(websocket: WebSocket):
     await websocket.accept()
     logger.info("🔌 Live diarization WebSocket connected")
     
-    session = LiveDiarizationSession()
-    chunk_buffer = np.array([], dtype=np.float32)
+    session = LiveDiarizationSession(voiceprints=VOICEPRINTS)
+    seeded = seed_from_query(websocket, session)
     CHUNK_DURATION = 2.0  # Process every 2 seconds
     SAMPLE_RATE = 16000
+    samples_needed = int(CHUNK_DURATION * SAMPLE_RATE)
+    # Fixed-size buffer: memory per socket does not grow with meeting length
+    ring = AudioRingBuffer(capacity=samples_needed * 2)
+    # Streaming VAD: each sample is scored once, even though windows overlap
+    vad = VADStream(SAMPLE_RATE)
+    # Bounded backlog: the receiver keeps reading while windows are processed
+    inbox = LiveInbox(SAMPLE_RATE, LIVE_LAG_BUDGET_SECONDS, LIVE_INBOX_MAX_MESSAGES)
+    receiver = asyncio.create_task(_receive_into(websocket, inbox))
+    lag_mode = None
+    last_lag_event = 0.0
     
     try:
         # Send ready message
         await websocket.send_json({
             "type": "ready",
             "message": "Live diarization ready",
-            "sample_rate": SAMPLE_RATE
+            "sample_rate": SAMPLE_RATE,
+            "seeded_speakers": seeded,
+            "lag_budget_seconds": LIVE_LAG_BUDGET_SECONDS
         })
         
         while True:
             # Receive audio chunk
-            data = await websocket.receive()
+            data = await inbox.get()
+            
+            if data.get("type") == "websocket.disconnect":
+                break
             
-            if "bytes" in data:
-                # Convert PCM bytes to float32
-                audio_data = data["bytes"]
-                audio_int16 = np.frombuffer(audio_data, dtype=np.int16)
-                audio_float = audio_int16.astype(np.float32) / 32768.0
+            if data.get("bytes"):
+                # Behind by more than half the budget: drop the window overlap;
+                # beyond the budget the inbox already dropped the oldest audio
+                mode = None
+                if inbox.unreported_drops:
+                    mode = "dropping"
+                elif inbox.lag_seconds > LIVE_LAG_BUDGET_SECONDS / 2:
+                    mode = "coarse"
+                if mode is not None and (mode != lag_mode or time.time() - last_lag_event >= 1.0):
+                    logger.warning(f"⚠️ Live session lagging ({mode}): {inbox.lag_seconds:.1f}s behind")
+                    await websocket.send_json({
+                        "type": "lagging",
+                        "mode": mode,
+                        "lag_seconds": round(inbox.lag_seconds, 2),
+                        "dropped_seconds": round(inbox.unreported_drops / SAMPLE_RATE, 2),
+                        "budget_seconds": LIVE_LAG_BUDGET_SECONDS
+                    })
+                    inbox.unreported_drops = 0
+                    last_lag_event = time.time()
+                lag_mode = mode
+                hop = samples_needed if lag_mode else samples_needed // 2
                 
-                # Add to buffer
-                chunk_buffer = np.concatenate([chunk_buffer, audio_float])
+                # Convert PCM bytes to float32 directly into the ring buffer
+                ring.write_pcm16(data["bytes"])
                 
-                # Process when we have enough audio
-                samples_needed = int(CHUNK_DURATION * SAMPLE_RATE)
+                # Score the new samples with VAD (batched with other sessions)
+                received = len(data["bytes"]) // 2
+                if received > ring.capacity:
+                    vad.skip(received - ring.capacity)
+                    received = ring.capacity
+                vad.feed(ring.latest(received))
+                await LIVE_VAD.process(vad)
                 
-                if len(chunk_buffer) >= samples_needed:
-                    # Extract the chunk to process
-                    audio_chunk = chunk_buffer[:samples_needed]
-                    chunk_buffer = chunk_buffer[samples_needed // 2:]  # 50% overlap
+                # Process every full window available
+                while ring.available >= samples_needed:
+                    # Zero-copy view of the window; stays valid until the next write,
+                    # which only happens after this window has been processed
+                    window_start = ring.position
+                    audio_chunk = ring.window(samples_needed)
+                    ring.consume(hop)  # 50% overlap (none while lagging)
                     
-                    # Detect speech in chunk
-                    speech_segments = detect_speech(audio_chunk, SAMPLE_RATE)
+                    # Speech in chunk, from the regions already found by streaming VAD
+                    speech_segments = vad.speech_in(window_start, window_start + samples_needed)
                     
                     if speech_segments:
                         # Process each speech segment
@@ -337,8 +738,8 @@ async def handle_live_diarization(websocket: WebSocket):
                             if end_sample > start_sample + int(1.0 * SAMPLE_RATE):  # Min 1 second for stable embeddings
                                 speech_audio = audio_chunk[start_sample:end_sample]
                                 
-                                # Extract embedding
-                                embedding = extract_embedding(speech_audio, SAMPLE_RATE)
+                                # Extract embedding (micro-batched with other sessions)
+                                embedding = await EMBEDDING_BATCHER.embed(speech_audio)
                                 
                                 if embedding is not None:
                                     # Identify speaker
@@ -347,30 +748,7 @@ async def handle_live_diarization(websocket: WebSocket):
                                     confidence = float(confidence)
                                     
                                     # Send speaker info
-                                    if speaker_id != session.current_speaker:
-                                        logger.info(f"📤 SENDING speaker update: {speaker_id} (current was: {session.current_speaker})")
-                                        if session.current_speaker:
-                                            msg = {
-                                                "type": "speaker_change",
-                                                "from": session.current_speaker,
-                                                "to": speaker_id,
-                                                "confidence": round(confidence, 2),
-                                                "is_new": is_new
-                                            }
-                                            logger.info(f"📤 WebSocket SEND: {msg}")
-                                            await websocket.send_json(msg)
-                                        else:
-                                            msg = {
-                                                "type": "speaker",
-                                                "speaker": speaker_id,
-                                                "confidence": round(confidence, 2),
-                                                "is_new": is_new
-                                            }
-                                            logger.info(f"📤 WebSocket SEND: {msg}")
-                                            await websocket.send_json(msg)
-                                        
-                                        session.current_speaker = speaker_id
-                                        logger.info(f"🎤 Speaker: {speaker_id} (confidence: {confidence:.2f}, new: {is_new})")
+                                    await send_speaker_update(websocket, session, speaker_id, confidence, is_new)
                     
             elif "text" in data:
                 # Handle text messages (config, stop, etc.)
@@ -380,11 +758,16 @@ async def handle_live_diarization(websocket: WebSocket):
                         logger.info("🛑 Stop signal received")
                         break
                     elif msg.get("type") == "reset":
-                        session = LiveDiarizationSession()
+                        session = LiveDiarizationSession(voiceprints=VOICEPRINTS)
+                        seed_from_query(websocket, session)
+                        ring = AudioRingBuffer(capacity=samples_needed * 2)
+                        vad = VADStream(SAMPLE_RATE)
                         await websocket.send_json({
                             "type": "reset",
                             "message": "Session reset"
                         })
+                    elif msg.get("type") == "enroll":
+                        await handle_enroll_message(websocket, session, msg)
                 except json.JSONDecodeError:
                     pass
                     
@@ -397,12 +780,14 @@ async def handle_live_diarization(websocket: WebSocket):
             "message": str(e)
         })
     finally:
+        receiver.cancel()
         # Send final summary
         try:
             await websocket.send_json({
                 "type": "summary",
                 "total_speakers": len(session.speakers),
-                "speakers": list(session.speakers.keys())
+                "speakers": list(session.speakers.keys()),
+                "dropped_seconds": round(inbox.dropped_samples / SAMPLE_RATE, 2)
             })
         except:
             pass
@@ -0,0 +1,317 @@
+"""
+📝 Live Transcription + Diarization via WebSocket
+Streaming ASR on the same socket and PCM framing as /ws/live-diarization
+
+Architecture:
+1. Client sends audio chunks (PCM 16kHz, 16-bit, mono) via WebSocket
+2. Streaming Silero VAD scores each new frame once; every second of new audio
+   the speech regions of the current utterance are checked
+3. While the utterance is open, faster-whisper emits a `partial` hypothesis
+4. When the speaker pauses (or the utterance gets too long), the utterance is
+   transcribed one last time (`final`) and its speaker embedding is matched
+   against the session speakers, exactly like live diarization
+
+Decoding runs on its own thread, so live partials never queue behind uploads
+and batch jobs on the shared inference executor. Calls on a model shared with
+/transcribe are still serialized by its lock (model_cache.SerializedModel).
+
+Usage:
+- Connect to ws://localhost:8082/ws/live-transcribe?model=base&language=fr
+- Send audio chunks as binary (PCM 16kHz, 16-bit, mono)
+- Receive JSON messages:
+  {"type": "partial", "text": "bonjour à", "start": 12.3, "end": 14.1, "speaker": "SPEAKER_01"}
+  {"type": "final", "text": "Bonjour à tous.", "start": 12.3, "end": 15.0, "speaker": "SPEAKER_01"}
+  {"type": "speaker_change", "from": "SPEAKER_01", "to": "SPEAKER_02", ...}
+"""
+
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+
+from embedding_batcher import EMBEDDING_BATCHER
+from live_vad import LIVE_VAD, VADStream
+from live_diarization import (
+    HUGGINGFACE_TOKEN,
+    LIVE_SESSIONS,
+    VOICEPRINTS,
+    LiveDiarizationSession,
+    handle_enroll_message,
+    reject_if_full,
+    seed_from_query,
+    send_speaker_update,
+)
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+PARTIAL_INTERVAL = 1.0        # Re-decode the open utterance every second of new audio
+END_SILENCE_SECONDS = 0.6     # Pause that closes an utterance
+MAX_UTTERANCE_SECONDS = 15.0  # Force a final on long monologues
+SPEECH_PADDING_SECONDS = 0.2  # Audio kept around speech boundaries
+MIN_EMBEDDING_SECONDS = 1.0   # Minimum speech for a stable speaker embedding
+MIN_SPEECH_MS = 250           # Shortest speech region kept by VAD ("oui", "non")
+
+# Dedicated thread: live decoding never waits behind the inference executor queue
+LIVE_ASR_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-asr")
+
+
+def transcribe_text(model, audio: np.ndarray, language: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Transcribe a short utterance -> (text, detected_language)"""
+    result = model.transcribe(audio, language=language, batch_size=16)
+    text = " ".join(seg.get("text", "").strip() for seg in result.get("segments", []))
+    return text.strip(), result.get("language", language)
+
+
+async def run_live(func: Callable, *args):
+    """Run a blocking call on the live ASR thread"""
+    return await asyncio.get_running_loop().run_in_executor(LIVE_ASR_EXECUTOR, func, *args)
+
+
+class LiveTranscriptionSession:
+    """Audio of the open utterance plus the speaker clustering of the meeting"""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.diarization = LiveDiarizationSession(sample_rate, voiceprints=VOICEPRINTS)
+        self.vad = VADStream(sample_rate, min_speech_ms=MIN_SPEECH_MS)
+        # Preallocated: an utterance is closed at MAX_UTTERANCE_SECONDS, checked every PARTIAL_INTERVAL
+        self._buffer = np.zeros(int((MAX_UTTERANCE_SECONDS + 2 * PARTIAL_INTERVAL) * sample_rate), dtype=np.float32)
+        self._length = 0
+        self.utterance_offset = 0  # Stream position (samples) of utterance[0]
+        self.samples_since_check = 0
+        self.finals = 0
+
+    @property
+    def utterance(self) -> np.ndarray:
+        """View of the open utterance audio (valid until the next append/consume)"""
+        return self._buffer[:self._length]
+
+    def append_pcm16(self, data: bytes):
+        """Append 16-bit PCM bytes, converted to float32 in [-1, 1] in place"""
+        pcm = np.frombuffer(data, dtype=np.int16, count=len(data) // 2)
+        if self._length + len(pcm) > len(self._buffer):
+            # Only if the client sends more than a check interval at once
+            grown = np.zeros(max(2 * len(self._buffer), self._length + len(pcm)), dtype=np.float32)
+            grown[:self._length] = self._buffer[:self._length]
+            self._buffer = grown
+        target = self._buffer[self._length:self._length + len(pcm)]
+        target[:] = pcm
+        target *= 1.0 / 32768.0
+        self._length += len(pcm)
+        self.vad.feed(target)
+        self.samples_since_check += len(pcm)
+
+    def consume(self, num_samples: int):
+        """Drop the first num_samples of the utterance (already handled)"""
+        num_samples = min(num_samples, self._length)
+        remaining = self._length - num_samples
+        self._buffer[:remaining] = self._buffer[num_samples:self._length]
+        self._length = remaining
+        self.utterance_offset += num_samples
+
+    def speech(self) -> List[Tuple[float, float]]:
+        """Speech regions of the utterance, in seconds from its start"""
+        return self.vad.speech_in(self.utterance_offset, self.utterance_offset + len(self.utterance))
+
+    @property
+    def utterance_start(self) -> float:
+        """Stream time (s) of utterance[0]"""
+        return self.utterance_offset / self.sample_rate
+
+    @property
+    def utterance_duration(self) -> float:
+        return self._length / self.sample_rate
+
+
+async def _identify_speaker(
+    websocket: WebSocket,
+    session: LiveTranscriptionSession,
+    audio: np.ndarray,
+    speech: List[Tuple[float, float]]
+) -> Optional[str]:
+    """Match the utterance speech against the session speakers"""
+    if not HUGGINGFACE_TOKEN:
+        return None
+
+    speech_audio = np.concatenate([
+        audio[int(start * session.sample_rate):int(end * session.sample_rate)]
+        for start, end in speech
+    ])
+    if len(speech_audio) < int(MIN_EMBEDDING_SECONDS * session.sample_rate):
+        return session.diarization.current_speaker
+
+    embedding = await EMBEDDING_BATCHER.embed(speech_audio)
+    if embedding is None:
+        return session.diarization.current_speaker
+
+    speaker_id, confidence, is_new = session.diarization.get_or_create_speaker(embedding)
+    await send_speaker_update(websocket, session.diarization, speaker_id, float(confidence), is_new)
+    return speaker_id
+
+
+async def _process_utterance(
+    websocket: WebSocket,
+    session: LiveTranscriptionSession,
+    model,
+    language: Optional[str],
+    force_final: bool = False
+) -> Optional[str]:
+    """
+    Check the speech of the open utterance and send a partial or a final hypothesis
+    - force_final: close the utterance now (end of session), whatever the trailing silence
+    """
+    sr = session.sample_rate
+    await LIVE_VAD.process(session.vad)
+    speech = session.speech()
+
+    if not speech:
+        # Silence only: keep a short tail in case speech is starting
+        session.consume(max(0, len(session.utterance) - int(SPEECH_PADDING_SECONDS * sr)))
+        return language
+
+    # Trim leading silence so partials stay short
+    lead = max(0, int((speech[0][0] - SPEECH_PADDING_SECONDS) * sr))
+    if lead:
+        session.consume(lead)
+        speech = [(start - lead / sr, end - lead / sr) for start, end in speech]
+
+    duration = session.utterance_duration
+    trailing_silence = duration - speech[-1][1]
+
+    if not force_final and trailing_silence < END_SILENCE_SECONDS and duration < MAX_UTTERANCE_SECONDS:
+        # Utterance still open: partial hypothesis
+        text, language = await run_live(transcribe_text, model, session.utterance, language)
+        if text:
+            await websocket.send_json({
+                "type": "partial",
+                "text": text,
+                "start": round(session.utterance_start, 2),
+                "end": round(session.utterance_start + duration, 2),
+                "speaker": session.diarization.current_speaker
+            })
+        return language
+
+    # Utterance closed (pause or max length): final hypothesis
+    cut = min(len(session.utterance), int((speech[-1][1] + SPEECH_PADDING_SECONDS) * sr))
+    final_audio = session.utterance[:cut]
+    text, language = await run_live(transcribe_text, model, final_audio, language)
+    speaker = await _identify_speaker(websocket, session, final_audio, speech)
+
+    if text:
+        session.finals += 1
+        await websocket.send_json({
+            "type": "final",
+            "text": text,
+            "start": round(session.utterance_start, 2),
+            "end": round(session.utterance_start + cut / sr, 2),
+            "speaker": speaker
+        })
+    session.consume(cut)
+    return language
+
+
+async def handle_live_transcription(websocket: WebSocket, load_model: Callable):
+    """
+    Handle WebSocket connection for live transcription + diarization
+
+    - load_model: callable(model_name) returning the cached WhisperX model
+
+    Query parameters: model (default: base), language (default: fr, empty = auto),
+    speakers (enrolled voiceprint names to seed the session with)
+    """
+    if await reject_if_full(websocket):
+        return
+    # Everything after the slot is taken runs under the finally that frees it
+    try:
+        await _serve_live_transcription(websocket, load_model)
+    finally:
+        LIVE_SESSIONS.release()
+
+
+async def _serve_live_transcription(websocket: WebSocket, load_model: Callable):
+    await websocket.accept()
+    model_name = websocket.query_params.get("model", "base")
+    language = websocket.query_params.get("language", "fr") or None
+    logger.info(f"🔌 Live transcription WebSocket connected (model={model_name}, language={language})")
+
+    session = LiveTranscriptionSession()
+    seeded = seed_from_query(websocket, session.diarization)
+
+    try:
+        model = await run_live(load_model, model_name)
+
+        await websocket.send_json({
+            "type": "ready",
+            "message": "Live transcription ready",
+            "sample_rate": SAMPLE_RATE,
+            "model": model_name,
+            "language": language,
+            "diarization": HUGGINGFACE_TOKEN is not None,
+            "seeded_speakers": seeded
+        })
+
+        while True:
+            data = await websocket.receive()
+
+            if data.get("type") == "websocket.disconnect":
+                break
+
+            if data.get("bytes"):
+                session.append_pcm16(data["bytes"])
+
+                if session.samples_since_check >= int(PARTIAL_INTERVAL * SAMPLE_RATE):
+                    session.samples_since_check = 0
+                    language = await _process_utterance(websocket, session, model, language)
+
+            elif data.get("text"):
+                try:
+                    msg = json.loads(data["text"])
+                    if msg.get("type") == "stop":
+                        logger.info("🛑 Stop signal received")
+                        # Flush the open utterance as a final hypothesis
+                        if session.utterance_duration > 0:
+                            language = await _process_utterance(websocket, session, model, language, force_final=True)
+                        break
+                    elif msg.get("type") == "reset":
+                        session = LiveTranscriptionSession()
+                        seed_from_query(websocket, session.diarization)
+                        await websocket.send_json({
+                            "type": "reset",
+                            "message": "Session reset"
+                        })
+                    elif msg.get("type") == "enroll":
+                        await handle_enroll_message(websocket, session.diarization, msg)
+                except json.JSONDecodeError:
+                    pass
+
+    except WebSocketDisconnect:
+        logger.info("🔌 Client disconnected")
+    except Exception as e:
+        logger.error(f"❌ WebSocket error: {e}")
+        try:
+            await websocket.send_json({
+                "type": "error",
+                "message": str(e)
+            })
+        except Exception:
+            pass
+    finally:
+        try:
+            await websocket.send_json({
+                "type": "summary",
+                "total_speakers": len(session.diarization.speakers),
+                "speakers": list(session.diarization.speakers.keys()),
+                "total_finals": session.finals
+            })
+        except Exception:
+            pass
+        logger.info(f"📊 Live transcription ended: {session.finals} finals, {len(session.diarization.speakers)} speakers")
+
+
+# Export the handler for FastAPI
+__all__ = ['handle_live_transcription']
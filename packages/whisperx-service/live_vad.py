@@ -0,0 +1,271 @@
+"""
+🎤 Streaming Silero VAD for live sessions
+Each live socket owns a `VADStream`: incoming audio is cut into 32 ms Silero
+frames, every frame goes through the model exactly once, and the model's
+recurrent state plus the speech/silence hysteresis are carried from one
+chunk to the next. Overlapping analysis windows then just look up the speech
+regions that were already found, instead of re-running VAD on them.
+
+Frames from every open session are stacked and scored in one model call
+(one row per session), on a dedicated thread, with each session's recurrent
+state swapped in and out of the batch.
+
+The hysteresis mirrors `get_speech_timestamps` with the live settings
+(threshold 0.5, min speech 800 ms, min silence 300 ms, 30 ms padding);
+the minimum speech duration can be lowered per stream (live ASR keeps short
+words that are too short for a speaker embedding).
+
+Configuration:
+- VAD_BATCH_MAX_SIZE: max sessions scored per model call (default: 64)
+"""
+
+import os
+import copy
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from metrics import INFERENCE_CALL_LATENCY, Histogram
+
+logger = logging.getLogger(__name__)
+
+VAD_BATCH_MAX_SIZE = int(os.getenv("VAD_BATCH_MAX_SIZE", "64"))
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 512          # Silero frame at 16 kHz (32 ms)
+VAD_THRESHOLD = 0.5
+MIN_SPEECH_MS = 800
+MIN_SILENCE_MS = 300
+SPEECH_PAD_MS = 30
+HISTORY_SECONDS = 30.0       # Closed speech regions kept for lookups
+
+# Recurrent state attributes of the Silero JIT model, with their batch dimension
+# (v5: _state + _context, v4: _h + _c)
+_STATE_ATTRS = (("_state", 1), ("_context", 0), ("_h", 1), ("_c", 1))
+
+# Dedicated instance: detect_speech() resets the shared model's state on every call
+_vad_model = None
+
+
+def _get_model():
+    global _vad_model
+    if _vad_model is None:
+        logger.info("🎤 Loading Silero VAD model for streaming...")
+        _vad_model, _ = torch.hub.load(
+            repo_or_dir='snakers4/silero-vad',
+            model='silero_vad',
+            force_reload=False
+        )
+        _vad_model.eval()  # CPU: frames are tiny, a GPU round-trip costs more
+    return _vad_model
+
+
+class VADStream:
+    """Streaming VAD state of one live session (positions are absolute sample counts)"""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, min_speech_ms: int = MIN_SPEECH_MS):
+        self.sample_rate = sample_rate
+        self.position = 0   # Samples received
+        self.processed = 0  # Samples scored by the model
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.state: Optional[Dict[str, torch.Tensor]] = None  # Model state (set by the batcher)
+        # Hysteresis (same rules as get_speech_timestamps)
+        self.triggered = False
+        self._speech_start = 0
+        self._temp_end = 0
+        self.segments: List[Tuple[int, int]] = []  # Closed speech regions
+        self._min_speech = min_speech_ms * sample_rate // 1000
+        self._min_silence = MIN_SILENCE_MS * sample_rate // 1000
+        self._pad = SPEECH_PAD_MS * sample_rate // 1000
+
+    def feed(self, samples: np.ndarray):
+        """Queue new audio (float32 in [-1, 1]); scored on the next batcher pass"""
+        self._pending = np.concatenate([self._pending, samples.astype(np.float32, copy=False)])
+        self.position += len(samples)
+
+    def skip(self, num_samples: int):
+        """Audio that was dropped before reaching VAD (treated as a gap)"""
+        gap_start = self.processed + len(self._pending)
+        self.processed = gap_start + num_samples
+        self.position += num_samples
+        self._pending = self._pending[:0]
+        self._close(self._temp_end or gap_start)
+
+    def has_frame(self) -> bool:
+        return len(self._pending) >= FRAME_SAMPLES
+
+    def next_frame(self) -> np.ndarray:
+        return self._pending[:FRAME_SAMPLES]
+
+    def advance(self, probability: float):
+        """Consume the current frame with its speech probability"""
+        frame_start = self.processed
+        self._pending = self._pending[FRAME_SAMPLES:]
+        self.processed += FRAME_SAMPLES
+
+        if probability >= VAD_THRESHOLD:
+            self._temp_end = 0
+            if not self.triggered:
+                self.triggered = True
+                self._speech_start = frame_start
+            return
+
+        if self.triggered and probability < VAD_THRESHOLD - 0.15:
+            if not self._temp_end:
+                self._temp_end = frame_start
+            if frame_start - self._temp_end >= self._min_silence:
+                self._close(self._temp_end)
+
+    def _close(self, end: int):
+        if self.triggered and end - self._speech_start > self._min_speech:
+            self.segments.append((max(0, self._speech_start - self._pad), end + self._pad))
+        self.triggered = False
+        self._temp_end = 0
+        # Forget regions nobody can look up anymore
+        horizon = self.processed - int(HISTORY_SECONDS * self.sample_rate)
+        while self.segments and self.segments[0][1] < horizon:
+            self.segments.pop(0)
+
+    def speech_in(self, start: int, end: int) -> List[Tuple[float, float]]:
+        """
+        Speech regions overlapping [start, end) (absolute samples)
+        Returns: (start_time, end_time) tuples in seconds relative to `start`,
+        like detect_speech() on that slice
+        """
+        regions = list(self.segments)
+        if self.triggered and self.processed - self._speech_start > self._min_speech:
+            regions.append((max(0, self._speech_start - self._pad), self.processed))
+        return [
+            ((max(s, start) - start) / self.sample_rate, (min(e, end) - start) / self.sample_rate)
+            for s, e in regions if s < end and e > start
+        ]
+
+
+class VADBatcher:
+    """Scores the pending frames of every session, one batched model call per frame step"""
+
+    def __init__(self, max_batch_size: int, sample_rate: int = SAMPLE_RATE):
+        self.max_batch_size = max(1, max_batch_size)
+        self.sample_rate = sample_rate
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vad")
+        self._state_attrs: Optional[List[Tuple[str, int]]] = None
+        self._initial_state: Dict[str, torch.Tensor] = {}
+        self.frames = 0
+        self.calls = 0
+        self.batch_size = Histogram([1, 2, 4, 8, 16, 32, 64])
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def process(self, stream: VADStream):
+        """Score every complete frame fed to `stream` (batched with other sessions)"""
+        if not stream.has_frame():
+            return
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((stream, future))
+        await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            error = None
+            try:
+                await loop.run_in_executor(self._executor, self._forward, [s for s, _ in batch])
+            except Exception as e:
+                logger.error(f"❌ Streaming VAD failed: {e}")
+                error = e
+            for stream, future in batch:
+                if future.done():
+                    continue
+                if error is not None:
+                    # Drop the unscored audio rather than retrying it forever
+                    stream.skip(0)
+                future.set_result(None)
+
+    def _inspect(self, model):
+        """Find the recurrent state tensors and their zero value for one stream"""
+        model.reset_states(1)
+        with torch.no_grad():
+            model(torch.zeros(1, FRAME_SAMPLES), self.sample_rate)
+        self._state_attrs = [
+            (name, dim) for name, dim in _STATE_ATTRS
+            if isinstance(getattr(model, name, None), torch.Tensor) and getattr(model, name).dim() > dim
+        ]
+        self._initial_state = {
+            name: torch.zeros_like(getattr(model, name)) for name, _ in self._state_attrs
+        }
+        if not self._state_attrs:
+            logger.warning("⚠️ Unknown Silero state layout: streaming VAD runs one session at a time")
+
+    def _score(self, model, streams: List[VADStream], frames: torch.Tensor) -> torch.Tensor:
+        if not self._state_attrs:
+            # Fallback: one model copy per session, carries its own state
+            probs = []
+            for stream, frame in zip(streams, frames):
+                if stream.state is None:
+                    stream.state = {"model": copy.deepcopy(model)}
+                    stream.state["model"].reset_states(1)
+                probs.append(stream.state["model"](frame.unsqueeze(0), self.sample_rate).flatten())
+            return torch.cat(probs)
+
+        for stream in streams:
+            if stream.state is None:
+                stream.state = dict(self._initial_state)
+        for name, dim in self._state_attrs:
+            setattr(model, name, torch.cat([stream.state[name] for stream in streams], dim=dim))
+        # Keep the model from resetting the state we just assembled
+        model._last_batch_size = len(streams)
+        model._last_sr = self.sample_rate
+
+        probs = model(frames, self.sample_rate).flatten()
+
+        for name, dim in self._state_attrs:
+            value = getattr(model, name)
+            for i, stream in enumerate(streams):
+                stream.state[name] = value.narrow(dim, i, 1).clone()
+        return probs
+
+    def _forward(self, streams: List[VADStream]):
+        model = _get_model()
+        if self._state_attrs is None:
+            self._inspect(model)
+
+        active = [stream for stream in dict.fromkeys(streams) if stream.has_frame()]
+        with torch.no_grad():
+            while active:
+                for i in range(0, len(active), self.max_batch_size):
+                    group = active[i:i + self.max_batch_size]
+                    frames = torch.from_numpy(np.stack([stream.next_frame() for stream in group]))
+                    call_start = time.perf_counter()
+                    probs = self._score(model, group, frames)
+                    INFERENCE_CALL_LATENCY.labels(model="silero-vad").observe(time.perf_counter() - call_start)
+                    for stream, probability in zip(group, probs.tolist()):
+                        stream.advance(probability)
+                    self.calls += 1
+                    self.frames += len(group)
+                    self.batch_size.observe(len(group))
+                active = [stream for stream in active if stream.has_frame()]
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "frames": self.frames,
+            "model_calls": self.calls,
+            "batch_size": self.batch_size.snapshot(),
+        }
+
+
+LIVE_VAD = VADBatcher(VAD_BATCH_MAX_SIZE)
@@ -0,0 +1,177 @@
+"""
+🧩 Long-recording mode for WhisperX
+Multi-hour files are split at VAD silences into chunks of bounded duration
+(see vad_chunking). The chunks are transcribed, then aligned, on a pool of
+LONG_AUDIO_WORKERS threads, and their segments are stitched back with global
+timestamps.
+
+Compared to one monolithic transcribe + align, peak memory follows the chunk
+size instead of the file size, and time-to-result goes down with the number
+of workers:
+- transcription: the ASR model is loaded with one CTranslate2 replica per
+  worker (see `asr_replicas`), and each worker decodes through its own
+  WhisperX pipeline wrapper (SerializedModel.replicas), so per-call state such
+  as the tokenizer is never shared between two chunks
+- alignment: wav2vec2 keeps no per-call state; while chunks are aligned in
+  parallel, torch intra-op threads are split between the workers
+
+Configuration:
+- LONG_AUDIO_MIN_SECONDS: recordings at least this long use chunks (default: 900)
+- LONG_AUDIO_CHUNK_SECONDS: max chunk duration (default: 300)
+- LONG_AUDIO_WORKERS: parallel chunks (default: 0 = 1 on GPU, one per 4 CPU cores)
+"""
+
+import os
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from vad_chunking import split_speech_chunks
+
+logger = logging.getLogger(__name__)
+
+LONG_AUDIO_MIN_SECONDS = float(os.getenv("LONG_AUDIO_MIN_SECONDS", "900"))
+LONG_AUDIO_CHUNK_SECONDS = float(os.getenv("LONG_AUDIO_CHUNK_SECONDS", "300"))
+LONG_AUDIO_WORKERS = max(1, int(os.getenv("LONG_AUDIO_WORKERS", "0")) or (
+    1 if torch.cuda.is_available() else (os.cpu_count() or 1) // 4
+))
+
+# Shared by every long request: at most LONG_AUDIO_WORKERS chunks run at once
+_chunk_executor = ThreadPoolExecutor(max_workers=LONG_AUDIO_WORKERS, thread_name_prefix="chunk")
+
+_torch_threads_lock = threading.Lock()
+_torch_threads_users = 0
+_torch_threads_default = 0
+
+
+def asr_replicas() -> Tuple[int, int]:
+    """(CTranslate2 workers, CPU threads per worker) for the ASR model"""
+    return LONG_AUDIO_WORKERS, max(1, (os.cpu_count() or 1) // LONG_AUDIO_WORKERS)
+
+
+@contextmanager
+def _split_torch_threads():
+    """Cap torch intra-op threads per worker while chunks are aligned in parallel"""
+    global _torch_threads_users, _torch_threads_default
+    if LONG_AUDIO_WORKERS == 1:
+        yield
+        return
+    with _torch_threads_lock:
+        if _torch_threads_users == 0:
+            _torch_threads_default = torch.get_num_threads()
+            torch.set_num_threads(max(1, _torch_threads_default // LONG_AUDIO_WORKERS))
+        _torch_threads_users += 1
+    try:
+        yield
+    finally:
+        with _torch_threads_lock:
+            _torch_threads_users -= 1
+            if _torch_threads_users == 0:
+                torch.set_num_threads(_torch_threads_default)
+
+
+def is_long(duration: float) -> bool:
+    return duration >= LONG_AUDIO_MIN_SECONDS
+
+
+def _shift(item: dict, offset: float) -> dict:
+    """Copy of a segment/word with its timestamps moved by `offset` seconds"""
+    shifted = dict(item)
+    for field in ("start", "end"):
+        if shifted.get(field) is not None:
+            shifted[field] = shifted[field] + offset
+    return shifted
+
+
+def transcribe_chunks(
+    whisper_model,
+    samples: np.ndarray,
+    sample_rate: int,
+    language: Optional[str]
+) -> dict:
+    """
+    Chunked transcription -> {"segments", "language", "chunks"}
+    chunks: [[start_s, end_s, segment_count], ...] in order, used by align_chunks
+    """
+    bounds = split_speech_chunks(samples, sample_rate, LONG_AUDIO_CHUNK_SECONDS)
+    logger.info(f"🧩 Long audio: {len(bounds)} chunks on {LONG_AUDIO_WORKERS} workers")
+    if not bounds:
+        return {"segments": [], "language": language, "chunks": []}
+
+    # One pipeline wrapper per worker, borrowed for the duration of a chunk
+    pipelines: "queue.Queue" = queue.Queue()
+    for replica in whisper_model.replicas(LONG_AUDIO_WORKERS):
+        pipelines.put(replica)
+
+    def run(chunk: Tuple[int, int], chunk_language: Optional[str]) -> dict:
+        start, end = chunk
+        pipeline = pipelines.get()
+        try:
+            return pipeline.transcribe(samples[start:end], language=chunk_language, batch_size=16)
+        finally:
+            pipelines.put(pipeline)
+
+    results = []
+    if not language:
+        # Detect the language once, on the first chunk, and use it for every chunk
+        results.append(run(bounds[0], None))
+        language = results[0].get("language")
+    results += list(_chunk_executor.map(lambda chunk: run(chunk, language), bounds[len(results):]))
+
+    segments, chunks = [], []
+    for (start, end), result in zip(bounds, results):
+        offset = start / sample_rate
+        chunk_segments = [_shift(seg, offset) for seg in result.get("segments", [])]
+        segments.extend(chunk_segments)
+        chunks.append([offset, end / sample_rate, len(chunk_segments)])
+    return {"segments": segments, "language": language, "chunks": chunks}
+
+
+def align_chunks(
+    transcript: dict,
+    model_a,
+    metadata,
+    samples: np.ndarray,
+    sample_rate: int,
+    device: str
+) -> dict:
+    """Align each chunk of a chunked transcript on its own slice -> {"segments", "word_segments"}"""
+    import whisperx
+
+    jobs: List[Tuple[float, float, List[dict]]] = []
+    position = 0
+    for start, end, count in transcript["chunks"]:
+        jobs.append((start, end, transcript["segments"][position:position + count]))
+        position += count
+
+    def run(job: Tuple[float, float, List[dict]]) -> dict:
+        start, end, chunk_segments = job
+        if not chunk_segments:
+            return {"segments": [], "word_segments": []}
+        return whisperx.align(
+            [_shift(seg, -start) for seg in chunk_segments],
+            model_a,
+            metadata,
+            samples[int(start * sample_rate):int(end * sample_rate)],
+            device,
+            return_char_alignments=False
+        )
+
+    with _split_torch_threads():
+        results = list(_chunk_executor.map(run, jobs))
+
+    segments, word_segments = [], []
+    for (start, _, _), result in zip(jobs, results):
+        for seg in result["segments"]:
+            seg = _shift(seg, start)
+            if "words" in seg:
+                seg["words"] = [_shift(word, start) for word in seg["words"]]
+            segments.append(seg)
+        word_segments.extend(_shift(word, start) for word in result.get("word_segments", []))
+    return {"segments": segments, "word_segments": word_segments}
@@ -0,0 +1,215 @@
+"""
+📊 Metrics for WhisperX
+Lightweight in-process histograms (thread-safe) used to report latencies and
+batch sizes in the status endpoints, and a small Prometheus registry served
+on /metrics.
+
+Every sample also carries the registry's constant labels (the device).
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+class Histogram:
+    """Fixed-bucket histogram: counts per upper bound, plus count and sum"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot: +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict:
+        """Cumulative bucket counts (Prometheus style), count, sum and mean"""
+        with self._lock:
+            counts = list(self._counts)
+            count, total = self._count, self._sum
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        return {
+            "buckets": cumulative,
+            "count": count,
+            "sum": round(total, 6),
+            "mean": round(total / count, 6) if count else 0.0,
+        }
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# Prometheus exposition (text format 0.0.4) - no client library needed
+# ───────────────────────────────────────────────────────────────────────────
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Value:
+    """Counter / gauge value of one label set"""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+
+class MetricFamily:
+    """One metric name with a fixed set of label names; children are created on first use"""
+
+    def __init__(self, name: str, documentation: str, kind: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind  # counter | gauge | histogram
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = Histogram(self.buckets) if self.kind == "histogram" else _Value()
+                    self._children[key] = child
+        return child
+
+    def render(self, const_labels: Dict[str, str]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            labels.update(const_labels)
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_value(child.value)}")
+                continue
+            snapshot = child.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {snapshot['count']}")
+        return lines
+
+
+class CallbackFamily(MetricFamily):
+    """Counter/gauge whose samples are read at scrape time: callback() -> [(labels, value)]"""
+
+    def __init__(self, name: str, documentation: str, kind: str, callback: Callable[[], List[Tuple[Dict, float]]]):
+        super().__init__(name, documentation, kind)
+        self.callback = callback
+
+    def render(self, const_labels: Dict[str, str]) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.callback():
+            lines.append(f"{self.name}{_format_labels({**labels, **const_labels})} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """All metric families of the process; `render()` is the /metrics payload"""
+
+    def __init__(self):
+        self.const_labels: Dict[str, str] = {}  # Added to every sample (e.g. device)
+        self._families: List[MetricFamily] = []
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        self._families.append(family)
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, documentation, "counter", labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, documentation, "gauge", labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]) -> MetricFamily:
+        return self._register(MetricFamily(name, documentation, "histogram", labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, kind: str, callback: Callable) -> MetricFamily:
+        return self._register(CallbackFamily(name, documentation, kind, callback))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self._families:
+            try:
+                lines.extend(family.render(self.const_labels))
+            except Exception as e:
+                lines.append(f"# {family.name} unavailable: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+STAGE_LATENCY = METRICS.histogram(
+    "whisperx_stage_duration_seconds",
+    "Pipeline stage latency (stages served from cache are not observed)",
+    ["stage", "model"],
+    buckets=[0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800],
+)
+REALTIME_FACTOR = METRICS.histogram(
+    "whisperx_realtime_factor",
+    "Processing time divided by audio duration, per request",
+    ["model"],
+    buckets=[0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5],
+)
+MODEL_CACHE_REQUESTS = METRICS.counter(
+    "whisperx_model_cache_requests_total",
+    "Model cache lookups by result (hit/miss)",
+    ["cache", "model", "result"],
+)
+WEBSOCKET_SESSIONS = METRICS.gauge(
+    "whisperx_websocket_sessions",
+    "Open websocket sessions",
+    ["endpoint"],
+)
+INFERENCE_CALL_LATENCY = METRICS.histogram(
+    "whisperx_inference_call_duration_seconds",
+    "Latency of one batched embedding / VAD model call",
+    ["model"],
+    buckets=[0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+)
+UPLOAD_BYTES = METRICS.counter(
+    "whisperx_upload_bytes_total",
+    "Bytes of audio received in uploads",
+)
+UPLOAD_SIZE = METRICS.histogram(
+    "whisperx_upload_size_bytes",
+    "Size of each audio upload",
+    [],
+    buckets=[2 ** p * 1024 * 1024 for p in range(0, 12)],  # 1 MB .. 2 GB
+)
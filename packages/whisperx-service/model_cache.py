@@ -0,0 +1,349 @@
+"""
+📦 Model caches for WhisperX
+- Per-model serialization of the shared WhisperX ASR pipelines
+- Bounded LRU cache for per-language alignment models (wav2vec2)
+- Shared registry of Pyannote diarization pipelines
+- Availability registry (on disk / loaded) for cheap health checks
+
+Alignment models are loaded once per language and kept in memory until the
+configured memory budget is exceeded, then the least recently used one is
+evicted. Diarization pipelines are loaded once (lazily, under a lock) and
+reused by every endpoint.
+"""
+
+import copy
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metrics import MODEL_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_model_bytes(model) -> int:
+    """Estimate the memory used by a torch model (parameters + buffers)"""
+    total = 0
+    try:
+        for tensor in list(model.parameters()) + list(model.buffers()):
+            total += tensor.numel() * tensor.element_size()
+    except Exception as e:
+        logger.debug(f"Could not estimate model size: {e}")
+    return total
+
+
+class SerializedModel:
+    """
+    Shared WhisperX pipeline whose `transcribe` runs one call at a time
+
+    FasterWhisperPipeline keeps per-call state on the instance: transcribe()
+    sets self.tokenizer / self.options, the batched decode reads them, and the
+    call ends with `self.tokenizer = None` when no language was preset. Two
+    concurrent calls (several INFERENCE_WORKERS, a job next to a live partial)
+    would decode with each other's tokenizer, or with None.
+    Every other attribute is read from the wrapped pipeline.
+    """
+
+    def __init__(self, pipeline):
+        self._pipeline = pipeline
+        self.lock = threading.Lock()
+        self._replicas: List["SerializedModel"] = []
+        self._replicas_lock = threading.Lock()
+
+    def transcribe(self, *args, **kwargs):
+        with self.lock:
+            return self._pipeline.transcribe(*args, **kwargs)
+
+    def replicas(self, count: int) -> List["SerializedModel"]:
+        """
+        `count` pipeline wrappers that can transcribe side by side
+
+        Each one is a shallow copy of the pipeline: its per-call state is its
+        own, while the CTranslate2 model, VAD and feature extractor are shared.
+        The calls only run in parallel if the model was loaded with
+        num_workers >= count (see long_audio.asr_replicas).
+        """
+        if count <= 1:
+            return [self]
+        with self._replicas_lock:
+            while len(self._replicas) < count:
+                self._replicas.append(SerializedModel(copy.copy(self._pipeline)))
+            return self._replicas[:count]
+
+    def __getattr__(self, name):
+        return getattr(self._pipeline, name)
+
+
+class AlignModelCache:
+    """
+    LRU cache of alignment models keyed by language code
+
+    - loader: callable(language_code) -> (model, metadata)
+    - max_bytes: memory budget; the most recent model is always kept,
+      even if it alone exceeds the budget
+
+    Loads are single-flight per language and run outside the cache lock, so
+    hits for other languages are never held up by a load.
+    """
+
+    def __init__(self, loader: Callable[[str], Tuple[Any, Dict]], max_bytes: int):
+        self._loader = loader
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, Dict, int]]" = OrderedDict()
+        self._lock = threading.Lock()  # Guards _entries and _load_locks
+        self._load_locks: Dict[str, threading.Lock] = {}  # One per language being loaded
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(size for _, _, size in self._entries.values())
+
+    def _lookup(self, language_code: str) -> Optional[Tuple[Any, Dict]]:
+        """Cached (model, metadata) or None (lock held)"""
+        entry = self._entries.get(language_code)
+        if entry is None:
+            return None
+        self._entries.move_to_end(language_code)
+        self.hits += 1
+        MODEL_CACHE_REQUESTS.labels(cache="align", model=language_code, result="hit").inc()
+        logger.info(f"📦 Using cached alignment model: {language_code}")
+        return entry[0], entry[1]
+
+    def get(self, language_code: str) -> Tuple[Any, Dict]:
+        """Return (model, metadata) for a language, loading it if needed"""
+        with self._lock:
+            cached = self._lookup(language_code)
+            if cached is not None:
+                return cached
+            load_lock = self._load_locks.setdefault(language_code, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # Loaded by a concurrent request while waiting
+                cached = self._lookup(language_code)
+                if cached is not None:
+                    return cached
+                self.misses += 1
+            MODEL_CACHE_REQUESTS.labels(cache="align", model=language_code, result="miss").inc()
+
+            logger.info(f"📥 Loading alignment model: {language_code}...")
+            start = time.time()
+            try:
+                model, metadata = self._loader(language_code)
+                size = estimate_model_bytes(model)
+                logger.info(
+                    f"✅ Alignment model {language_code} loaded in {time.time() - start:.2f}s "
+                    f"({size / 1024 / 1024:.0f} MB)"
+                )
+                with self._lock:
+                    self._entries[language_code] = (model, metadata, size)
+                    self._evict()
+            finally:
+                with self._lock:
+                    self._load_locks.pop(language_code, None)
+            return model, metadata
+
+    def _evict(self):
+        """Drop least recently used models until the budget is respected"""
+        while len(self._entries) > 1 and self.used_bytes > self.max_bytes:
+            language_code, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            logger.info(f"🗑️ Evicted alignment model: {language_code}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "languages": list(self._entries.keys()),
+            "used_mb": round(self.used_bytes / 1024 / 1024, 1),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+DEFAULT_DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
+
+class DiarizationPipelineRegistry:
+    """
+    Process-wide registry of Pyannote diarization pipelines
+
+    Each pipeline is loaded at most once, on first use, and moved to the
+    requested device. Concurrent callers wait on the same load instead of
+    triggering a second `from_pretrained`.
+    """
+
+    def __init__(self):
+        self._pipelines: Dict[str, Any] = {}
+        self._states: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        device: str,
+        huggingface_token: Optional[str],
+        model_id: str = DEFAULT_DIARIZATION_MODEL
+    ):
+        """Return the loaded pipeline for model_id, loading it if needed"""
+        pipeline = self._pipelines.get(model_id)
+        if pipeline is not None:
+            MODEL_CACHE_REQUESTS.labels(cache="diarization", model=model_id, result="hit").inc()
+            return pipeline
+
+        with self._lock:
+            pipeline = self._pipelines.get(model_id)
+            if pipeline is not None:
+                MODEL_CACHE_REQUESTS.labels(cache="diarization", model=model_id, result="hit").inc()
+                return pipeline
+            MODEL_CACHE_REQUESTS.labels(cache="diarization", model=model_id, result="miss").inc()
+
+            if not huggingface_token:
+                raise ValueError("HUGGINGFACE_TOKEN required for speaker diarization")
+
+            self._states[model_id] = {"state": "loading", "error": None, "load_time": None}
+            logger.info(f"📥 Loading diarization pipeline: {model_id}...")
+            start = time.time()
+            try:
+                import torch
+                from pyannote.audio import Pipeline as DiarizationPipeline
+
+                pipeline = DiarizationPipeline.from_pretrained(
+                    model_id,
+                    use_auth_token=huggingface_token
+                )
+                pipeline.to(torch.device(device))
+            except Exception as e:
+                self._states[model_id] = {"state": "failed", "error": str(e), "load_time": None}
+                logger.error(f"❌ Failed to load diarization pipeline {model_id}: {e}")
+                raise
+
+            load_time = time.time() - start
+            self._pipelines[model_id] = pipeline
+            self._states[model_id] = {"state": "loaded", "error": None, "load_time": round(load_time, 2)}
+            logger.info(f"✅ Diarization pipeline loaded in {load_time:.2f}s")
+            return pipeline
+
+    def is_loaded(self, model_id: str = DEFAULT_DIARIZATION_MODEL) -> bool:
+        return model_id in self._pipelines
+
+    def status(self) -> Dict:
+        return {model_id: dict(state) for model_id, state in self._states.items()}
+
+
+DIARIZATION_PIPELINES = DiarizationPipelineRegistry()
+
+
+# Pyannote repositories used by diarization, and one file proving each is in the HF cache
+PYANNOTE_MODELS = [
+    {
+        "id": "pyannote/speaker-diarization-3.1",
+        "file": "config.yaml",
+        "name": "Speaker Diarization 3.1",
+        "size": "1.5 GB",
+        "description": "Main diarization model",
+        "required": True,
+        "main": True
+    },
+    {
+        "id": "pyannote/segmentation-3.0",
+        "file": "pytorch_model.bin",
+        "name": "Segmentation 3.0",
+        "size": "900 MB",
+        "description": "Auto-downloaded with main model",
+        "required": True,
+        "main": False
+    },
+    {
+        "id": "pyannote/wespeaker-voxceleb-resnet34-LM",
+        "file": "pytorch_model.bin",
+        "name": "Speaker Embeddings",
+        "size": "500 MB",
+        "description": "Auto-downloaded with main model",
+        "required": True,
+        "main": False
+    }
+]
+
+
+class ModelAvailabilityRegistry:
+    """
+    What is on disk and what is loaded, without loading anything
+
+    The local Hugging Face cache is checked per model (a file lookup, no
+    weights are read). Only hits are remembered, so a model fetched later
+    (another replica, a manual download) shows up on the next probe. Once
+    the main pipeline is loaded, every model it depends on is on disk.
+    """
+
+    def __init__(self, models, pipelines: DiarizationPipelineRegistry):
+        self._models = {model["id"]: model for model in models}
+        self._pipelines = pipelines
+        self._downloaded: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def _check_cache(self, model_id: str) -> bool:
+        try:
+            from huggingface_hub import try_to_load_from_cache
+            path = try_to_load_from_cache(model_id, self._models[model_id]["file"])
+            return isinstance(path, str)
+        except Exception as e:
+            logger.debug(f"Could not check HF cache for {model_id}: {e}")
+            return False
+
+    def is_downloaded(self, model_id: str) -> bool:
+        if self._pipelines.is_loaded(model_id):
+            return True
+        if model_id in self._models and self._pipelines.is_loaded(DEFAULT_DIARIZATION_MODEL):
+            return True
+        if self._downloaded.get(model_id):
+            return True
+        downloaded = self._check_cache(model_id)
+        if downloaded:
+            with self._lock:
+                self._downloaded[model_id] = True
+        return downloaded
+
+    def refresh(self):
+        """Forget cached answers (next lookup re-checks the HF cache)"""
+        with self._lock:
+            self._downloaded.clear()
+
+    def download(self, model_id: str, huggingface_token: str):
+        """Fetch a repository into the HF cache (blocking, no model instantiation)"""
+        from huggingface_hub import snapshot_download
+        logger.info(f"📥 Downloading {model_id}...")
+        snapshot_download(repo_id=model_id, token=huggingface_token)
+        if model_id not in self._models or self._check_cache(model_id):
+            with self._lock:
+                self._downloaded[model_id] = True
+        logger.info(f"✅ {model_id} downloaded")
+
+    def diarization_available(self, huggingface_token: Optional[str]) -> bool:
+        return bool(huggingface_token) and all(
+            self.is_downloaded(model_id)
+            for model_id, model in self._models.items() if model["required"]
+        )
+
+    def models(self) -> list:
+        """Model descriptions with download and load state"""
+        status = self._pipelines.status()
+        result = []
+        for model_id, model in self._models.items():
+            info = {key: value for key, value in model.items() if key != "file"}
+            info["downloaded"] = self.is_downloaded(model_id)
+            info["state"] = status.get(model_id, {}).get("state") or (
+                "downloaded" if info["downloaded"] else "not_downloaded"
+            )
+            result.append(info)
+        return result
+
+
+MODEL_AVAILABILITY = ModelAvailabilityRegistry(PYANNOTE_MODELS, DIARIZATION_PIPELINES)
@@ -6,9 +6,12 @@ Combines: faster-whisper + phoneme alignment + speaker diarization
 
 import os
 import time
+import shutil
 import tempfile
+import threading
 from pathlib import Path
-from typing import Optional, List
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Optional, List, Tuple
 import logging
 
 # ⚠️ CRITICAL: Disable PyTorch weights_only BEFORE any other imports
@@ -28,11 +31,34 @@ torch.load = _patched_torch_load
 
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import whisperx
 import torch
 import json
 import asyncio
+import numpy as np
+
+from model_cache import AlignModelCache, DIARIZATION_PIPELINES, DEFAULT_DIARIZATION_MODEL, MODEL_AVAILABILITY, SerializedModel
+from inference_executor import INFERENCE_EXECUTOR, run_inference
+from result_cache import RESULT_CACHE, STAGE_CACHE, file_sha256, make_cache_key
+from audio_decode import DecodedAudio
+from embedding_batcher import EMBEDDING_BATCHER
+from voiceprints import VOICEPRINTS, VoiceprintStoreUnavailable
+from live_vad import LIVE_VAD
+from live_diarization import LIVE_SESSIONS, LIVE_LAG_BUDGET_SECONDS
+from warmup import WARMUP, synthetic_audio
+from long_audio import align_chunks, asr_replicas, is_long, transcribe_chunks
+from speaker_assignment import assign_word_speakers
+from asr_batcher import ASRBatcher, ASR_BATCH_MAX_REQUESTS, ASR_BATCH_WAIT_MS
+from metrics import (
+    METRICS,
+    MODEL_CACHE_REQUESTS,
+    REALTIME_FACTOR,
+    STAGE_LATENCY,
+    WEBSOCKET_SESSIONS,
+)
+from upload_spool import spool_upload, upload_size_limit
+from job_queue import JobQueue, JobQueueUnavailable, JOBS_DIR, JOBS_WORKERS, JOBS_RETENTION_HOURS, COMPLETED, FAILED
 
 # Configure logging
 logging.basicConfig(
@@ -56,15 +82,49 @@ app.add_middleware(
         "http://localhost",
     ],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
 )
 
+# Reject oversized uploads from Content-Length before reading the body
+app.middleware("http")(upload_size_limit)
+
 # Global state
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 COMPUTE_TYPE = "float16" if DEVICE == "cuda" else "int8"
-MODEL_CACHE = {}
+MODEL_CACHE = {}  # model name -> SerializedModel
+_model_load_lock = threading.Lock()
 HUGGINGFACE_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
+GPU_AVAILABLE = torch.cuda.is_available()
+WHISPERX_VERSION = getattr(whisperx, "__version__", "unknown")
+
+# Alignment models (wav2vec2) cached per language, bounded by a memory budget
+ALIGN_CACHE_MAX_MB = int(os.getenv("ALIGN_CACHE_MAX_MB", "2048"))
+ALIGN_MODEL_CACHE = AlignModelCache(
+    loader=lambda language_code: whisperx.load_align_model(
+        language_code=language_code,
+        device=DEVICE
+    ),
+    max_bytes=ALIGN_CACHE_MAX_MB * 1024 * 1024
+)
+
+# Diarization only reads the audio: it runs on its own thread, next to the
+# transcription + alignment of the same request (one thread per pipeline)
+DIARIZATION_EXECUTOR = ThreadPoolExecutor(
+    max_workers=INFERENCE_EXECUTOR.max_workers,
+    thread_name_prefix="diarize"
+)
+
+# Every Prometheus sample is labeled with the device
+METRICS.const_labels["device"] = DEVICE
+METRICS.callback(
+    "whisperx_inference_tasks",
+    "Inference executor tasks by state",
+    "gauge",
+    lambda: [
+        ({"state": state}, INFERENCE_EXECUTOR.stats()[state]) for state in ("queued", "in_flight")
+    ]
+)
 
 logger.info(f"🚀 WhisperX initialized on {DEVICE} with {COMPUTE_TYPE}")
 logger.info(f"🔑 HuggingFace token: {'✅ Found' if HUGGINGFACE_TOKEN else '❌ Not set'}")
@@ -73,6 +133,12 @@ logger.info(f"🔑 HuggingFace token: {'✅ Found' if HUGGINGFACE_TOKEN else '
 @app.on_event("startup")
 async def preload_models():
     """Preload Pyannote models at startup for faster first use"""
+    # Check the HF cache once so /health never touches the disk
+    diarization_available = await run_inference(
+        MODEL_AVAILABILITY.diarization_available, HUGGINGFACE_TOKEN
+    )
+    logger.info(f"🎭 Diarization models available: {diarization_available}")
+    
     try:
         logger.info("🔄 Preloading Pyannote models...")
         from live_diarization import get_vad_model, get_embedding_model
@@ -86,64 +152,667 @@ async def preload_models():
         get_embedding_model()
         
         logger.info("✅ All Pyannote models preloaded successfully!")
+
     except Exception as e:
         logger.warning(f"⚠️ Could not preload Pyannote models: {e}")
         logger.warning("Models will be loaded on first use instead.")
 
 
+@app.on_event("shutdown")
+async def shutdown_executor():
+    """Stop accepting inference work on shutdown"""
+    INFERENCE_EXECUTOR.shutdown()
+
+
 def get_or_load_model(model_name: str = "base"):
-    """Load or retrieve cached WhisperX model"""
+    """
+    Load or retrieve cached WhisperX model
+    The pipeline is wrapped so that its transcribe() calls are serialized
+    (see SerializedModel); concurrent requests for a missing model share one load.
+    """
     if model_name in MODEL_CACHE:
+        MODEL_CACHE_REQUESTS.labels(cache="asr", model=model_name, result="hit").inc()
         logger.info(f"📦 Using cached model: {model_name}")
         return MODEL_CACHE[model_name]
     
+    with _model_load_lock:
+        if model_name in MODEL_CACHE:
+            MODEL_CACHE_REQUESTS.labels(cache="asr", model=model_name, result="hit").inc()
+            return MODEL_CACHE[model_name]
+        return _load_model(model_name)
+
+
+def _load_model(model_name: str) -> SerializedModel:
+    MODEL_CACHE_REQUESTS.labels(cache="asr", model=model_name, result="miss").inc()
     logger.info(f"📥 Loading WhisperX model: {model_name}...")
     start = time.time()
     
+    # One CTranslate2 replica per long-audio worker so chunks decode in parallel
+    num_workers, cpu_threads = asr_replicas()
+    load_kwargs = {}
+    if num_workers > 1:
+        from whisperx.asr import WhisperModel
+        load_kwargs["model"] = WhisperModel(
+            model_name,
+            device=DEVICE,
+            compute_type=COMPUTE_TYPE,
+            download_root="/app/models",
+            num_workers=num_workers,
+            cpu_threads=cpu_threads
+        )
     model = whisperx.load_model(
         model_name,
         device=DEVICE,
         compute_type=COMPUTE_TYPE,
-        download_root="/app/models"
+        download_root="/app/models",
+        **load_kwargs
     )
     
-    MODEL_CACHE[model_name] = model
+    MODEL_CACHE[model_name] = SerializedModel(model)
     logger.info(f"✅ Model loaded in {time.time() - start:.2f}s")
-    return model
+    return MODEL_CACHE[model_name]
 
 
-def check_pyannote_models_downloaded():
-    """Check if Pyannote models are actually downloaded"""
-    if not HUGGINGFACE_TOKEN:
-        return False
-    
-    try:
-        from pyannote.audio import Pipeline as DiarizationPipeline
-        # Try to load the model - will fail if not downloaded
-        DiarizationPipeline.from_pretrained(
-            "pyannote/speaker-diarization-3.1",
-            use_auth_token=HUGGINGFACE_TOKEN
+def warm_up_model(model_name: str, language: Optional[str]):
+    """Load an ASR model (and the alignment model of `language`) and run it once"""
+    audio = synthetic_audio()
+    whisper_model = get_or_load_model(model_name)
+    whisper_model.transcribe(audio, language=language, batch_size=1)
+    # The VAD may find no speech in a synthetic signal: run the decoder directly too
+    decoder = getattr(whisper_model, "model", None)
+    if decoder is not None:
+        segments, _ = decoder.transcribe(audio, language=language, beam_size=1)
+        list(segments)
+    if language:
+        model_a, metadata = ALIGN_MODEL_CACHE.get(language)
+        whisperx.align(
+            [{"start": 0.0, "end": len(audio) / 16000, "text": "warm up"}],
+            model_a,
+            metadata,
+            audio,
+            DEVICE,
+            return_char_alignments=False
         )
-        return True
-    except Exception as e:
-        logger.debug(f"Pyannote models not available: {e}")
-        return False
+
+
+_warm_up_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Warm the PRELOAD_MODELS in the background; /ready reports 503 until done"""
+    global _warm_up_task
+    if not WARMUP.complete:
+        _warm_up_task = asyncio.create_task(WARMUP.run(warm_up_model))
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    # Check if Pyannote models are actually downloaded (not just token present)
-    diarization_available = check_pyannote_models_downloaded()
-    
+    """
+    Liveness: answers from in-memory state only (no model is loaded here)
+    The HF cache lookup behind diarization_available happens once, then is remembered.
+    Use /ready for deep readiness.
+    """
     return {
         "status": "ok",
         "backend": "whisperx",
         "device": DEVICE,
         "compute_type": COMPUTE_TYPE,
-        "gpu_available": torch.cuda.is_available(),
-        "diarization_available": diarization_available,
-        "version": whisperx.__version__ if hasattr(whisperx, '__version__') else "unknown"
+        "gpu_available": GPU_AVAILABLE,
+        "diarization_available": MODEL_AVAILABILITY.diarization_available(HUGGINGFACE_TOKEN),
+        "version": WHISPERX_VERSION
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: job workers running, model and cache state (503 until ready)"""
+    checks = {
+        "inference_executor": not INFERENCE_EXECUTOR.is_shutdown,
+        "job_queue": JOB_QUEUE.is_running,
+        "warm_up": WARMUP.ready,
+    }
+    ready = all(checks.values())
+    payload = {
+        "ready": ready,
+        "checks": checks,
+        "device": DEVICE,
+        "asr_models_loaded": list(MODEL_CACHE.keys()),
+        "warm_up": WARMUP.status(),
+        "diarization_available": MODEL_AVAILABILITY.diarization_available(HUGGINGFACE_TOKEN),
+        "diarization_models": MODEL_AVAILABILITY.models() if HUGGINGFACE_TOKEN else [],
+        "align_cache": ALIGN_MODEL_CACHE.stats(),
+        "diarization_pipelines": DIARIZATION_PIPELINES.status(),
+        "inference": INFERENCE_EXECUTOR.stats(),
+        "jobs": JOB_QUEUE.stats(),
+        "result_cache": RESULT_CACHE.stats(),
+        "stage_cache": STAGE_CACHE.stats(),
+        "asr_batcher": ASR_BATCHER.stats(),
+        "voiceprints": VOICEPRINTS.stats(),
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=payload)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics (text exposition format)"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+# ───────────────────────────────────────────────────────────────────────────
+# Pipeline stages
+# Each stage output is memoized in STAGE_CACHE, keyed by the audio hash and
+# the stage parameters, so a later request only runs the stages it is missing
+# (e.g. diarization on top of a cached alignment).
+# ───────────────────────────────────────────────────────────────────────────
+
+def transcribe_stage_key(audio_sha256: str, model: str, language: Optional[str]) -> str:
+    return make_cache_key(audio_sha256, stage="transcribe", model=model, language=language)
+
+
+def transcribe_stage(audio: DecodedAudio, audio_sha256: str, model: str, language: Optional[str]) -> Tuple[dict, bool]:
+    """Raw Whisper segments -> ({"segments", "language"}, from_cache)"""
+    key = transcribe_stage_key(audio_sha256, model, language)
+    cached = STAGE_CACHE.get(key)
+    if cached is not None:
+        logger.info("💾 Using cached transcription segments")
+        return cached, True
+    
+    whisper_model = get_or_load_model(model)
+    if is_long(audio.duration):
+        # Long recording: VAD chunks transcribed in parallel, global timestamps
+        output = transcribe_chunks(whisper_model, audio.samples, audio.sample_rate, language)
+    else:
+        result = whisper_model.transcribe(
+            audio.samples,
+            language=language,
+            batch_size=16
+        )
+        output = {
+            "segments": result["segments"],
+            "language": result.get("language", language)
+        }
+    STAGE_CACHE.put(key, output)
+    return output, False
+
+
+ALIGNMENT_MODES = ("full", "none", "deferred")
+
+
+def parse_alignment(value: Optional[str]) -> Tuple[str, Optional[float]]:
+    """`full`, `none`, `deferred` or `budget=<seconds>` -> (mode, budget_seconds)"""
+    value = (value or "full").strip().lower()
+    if value in ALIGNMENT_MODES:
+        return value, None
+    if value.startswith("budget="):
+        try:
+            budget = float(value[len("budget="):])
+        except ValueError:
+            budget = 0
+        if budget > 0:
+            return "budget", budget
+    raise HTTPException(
+        status_code=400,
+        detail="alignment must be one of full, none, deferred, budget=<seconds>"
+    )
+
+
+def align_within_budget(audio: DecodedAudio, transcript: dict, budget: float) -> dict:
+    """
+    Align segments in order until `budget` seconds have elapsed (model load included)
+    The remaining segments keep their raw Whisper timestamps.
+    Returns: {"segments", "word_segments", "aligned_segments"}
+    """
+    deadline = time.time() + budget
+    model_a, metadata = ALIGN_MODEL_CACHE.get(transcript["language"])
+    segments, word_segments = [], []
+    aligned = 0
+    for seg in transcript["segments"]:
+        if time.time() >= deadline:
+            break
+        result = whisperx.align([seg], model_a, metadata, audio.samples, DEVICE, return_char_alignments=False)
+        segments.extend(result["segments"])
+        word_segments.extend(result.get("word_segments", []))
+        aligned += 1
+    logger.info(f"⏱️ Aligned {aligned}/{len(transcript['segments'])} segments within {budget}s")
+    return {
+        "segments": segments + transcript["segments"][aligned:],
+        "word_segments": word_segments,
+        "aligned_segments": aligned
+    }
+
+
+def align_stage(
+    audio: DecodedAudio,
+    audio_sha256: str,
+    model: str,
+    language: Optional[str],
+    transcript: dict,
+    budget: Optional[float] = None
+) -> Tuple[dict, bool]:
+    """
+    Word-level aligned segments -> ({"segments", "word_segments"}, from_cache)
+    With a budget, a partial alignment is returned and not cached.
+    """
+    key = make_cache_key(audio_sha256, stage="align", model=model, language=language)
+    cached = STAGE_CACHE.get(key)
+    if cached is not None:
+        logger.info("💾 Using cached alignment")
+        return cached, True
+    
+    if budget is not None:
+        output = align_within_budget(audio, transcript, budget)
+        if output["aligned_segments"] < len(transcript["segments"]):
+            return output, False
+        output.pop("aligned_segments")
+        STAGE_CACHE.put(key, output)
+        return output, False
+    
+    model_a, metadata = ALIGN_MODEL_CACHE.get(transcript["language"])
+    if transcript.get("chunks"):
+        # Chunked transcript: each chunk aligned on its own slice, in parallel
+        result = align_chunks(transcript, model_a, metadata, audio.samples, audio.sample_rate, DEVICE)
+    else:
+        result = whisperx.align(
+            transcript["segments"],
+            model_a,
+            metadata,
+            audio.samples,
+            DEVICE,
+            return_char_alignments=False
+        )
+    output = {
+        "segments": result["segments"],
+        "word_segments": result.get("word_segments", [])
+    }
+    STAGE_CACHE.put(key, output)
+    return output, False
+
+
+def diarize_stage(
+    audio: DecodedAudio,
+    audio_sha256: str,
+    min_speakers: Optional[int],
+    max_speakers: Optional[int]
+) -> Tuple[dict, bool]:
+    """
+    Speaker turns + cluster embeddings -> (output, from_cache)
+    output: {"turns": [{"start", "end", "speaker"}], "centroids": {speaker: [floats]}}
+    """
+    key = make_cache_key(
+        audio_sha256,
+        stage="diarize-embeddings",
+        pipeline=DEFAULT_DIARIZATION_MODEL,
+        min_speakers=min_speakers,
+        max_speakers=max_speakers
+    )
+    cached = STAGE_CACHE.get(key)
+    if cached is not None:
+        logger.info("💾 Using cached diarization turns")
+        return cached, True
+    
+    # Shared pipeline: loaded once, reused by every request
+    diarize_model = DIARIZATION_PIPELINES.get(DEVICE, HUGGINGFACE_TOKEN)
+    # Cluster embeddings (same WeSpeaker space as voiceprints), ordered like labels()
+    annotation, embeddings = diarize_model(
+        audio.as_pyannote_input(),
+        min_speakers=min_speakers,
+        max_speakers=max_speakers,
+        return_embeddings=True
+    )
+    turns = [
+        {"start": turn.start, "end": turn.end, "speaker": speaker}
+        for turn, _, speaker in annotation.itertracks(yield_label=True)
+    ]
+    output = {
+        "turns": turns,
+        "centroids": {
+            label: embeddings[i] for i, label in enumerate(annotation.labels())
+            if embeddings is not None and i < len(embeddings)
+        }
+    }
+    STAGE_CACHE.put(key, output)
+    return output, False
+
+
+def name_speakers(turns: List[dict], centroids: dict) -> Tuple[List[dict], dict]:
+    """
+    Replace cluster labels by enrolled voiceprint names where one matches
+    Returns: (turns, {cluster_label: name})
+    """
+    mapping = VOICEPRINTS.identify_clusters({
+        label: np.asarray(centroid, dtype=np.float32) for label, centroid in centroids.items()
+    })
+    if mapping:
+        logger.info(f"🗂️ Recognized speakers: {mapping}")
+        turns = [dict(turn, speaker=mapping.get(turn["speaker"], turn["speaker"])) for turn in turns]
+    return turns, mapping
+
+
+def assign_speakers(turns: List[dict], aligned: dict) -> dict:
+    """Attach speaker labels from diarization turns to aligned words/segments"""
+    return assign_word_speakers(turns, aligned)
+
+
+def run_transcription_pipeline(
+    audio_path: str,
+    language: Optional[str] = "fr",
+    model: Optional[str] = "base",
+    diarization: Optional[bool] = False,
+    min_speakers: Optional[int] = None,
+    max_speakers: Optional[int] = None,
+    audio_sha256: Optional[str] = None,
+    alignment: Optional[str] = "full",
+) -> dict:
+    """
+    Blocking transcription pipeline: transcribe -> align -> diarize
+    Must run on the inference executor, never directly on the event loop.
+    The file is decoded once (on the first stage that needs samples) and
+    the waveform is shared by every stage.
+    Returns the /transcribe response payload.
+    """
+    with DecodedAudio(audio_path) as audio:
+        return _run_pipeline_stages(
+            audio,
+            language=language,
+            model=model,
+            diarization=diarization,
+            min_speakers=min_speakers,
+            max_speakers=max_speakers,
+            audio_sha256=audio_sha256 or file_sha256(audio_path),
+            alignment=alignment
+        )
+
+
+def _run_pipeline_stages(
+    audio: DecodedAudio,
+    language: Optional[str],
+    model: Optional[str],
+    diarization: Optional[bool],
+    min_speakers: Optional[int],
+    max_speakers: Optional[int],
+    audio_sha256: str,
+    alignment: Optional[str] = "full",
+    batched: Optional[Tuple[dict, float]] = None,
+) -> dict:
+    """
+    Pipeline stages on an already opened audio
+    - batched: (transcript, seconds) when the transcription already ran in a
+      cross-request batch (see transcribe_batched)
+    """
+    start_time = time.time()
+    cached_stages = []
+    
+    # Diarization starts first, in parallel with transcription + alignment,
+    # and is joined before speaker assignment
+    diarize_future: Optional[Future] = None
+    if diarization and HUGGINGFACE_TOKEN:
+        audio.samples  # Decode once here, not concurrently from both stages
+        diarize_future = DIARIZATION_EXECUTOR.submit(
+            timed_stage, diarize_stage, audio, audio_sha256, min_speakers, max_speakers
+        )
+        logger.info("🎭 Speaker diarization started (parallel to transcription)")
+    
+    try:
+        return _run_asr_and_join(
+            audio, language, model, diarization, audio_sha256, alignment,
+            diarize_future, start_time, cached_stages, batched
+        )
+    except BaseException:
+        # Transcription failed before the join: drop diarization if it has not
+        # started, else wait for it, since it reads the audio the caller closes
+        # next (its output still lands in STAGE_CACHE)
+        if diarize_future is not None and not diarize_future.cancel():
+            wait([diarize_future])
+            if diarize_future.exception() is not None:
+                logger.warning(f"⚠️ Diarization failed: {diarize_future.exception()}")
+        raise
+
+
+def timed_stage(stage, *args) -> Tuple[dict, bool, float]:
+    """Run a stage -> (output, from_cache, seconds)"""
+    start = time.time()
+    output, from_cache = stage(*args)
+    return output, from_cache, time.time() - start
+
+
+def _run_asr_and_join(
+    audio: DecodedAudio,
+    language: Optional[str],
+    model: Optional[str],
+    diarization: Optional[bool],
+    audio_sha256: str,
+    alignment: Optional[str],
+    diarize_future: Optional[Future],
+    start_time: float,
+    cached_stages: List[str],
+    batched: Optional[Tuple[dict, float]] = None,
+) -> dict:
+    # Step 1: Transcribe (loads the Whisper model on first use)
+    if batched is not None:
+        transcript, transcribe_time = batched
+        from_cache = False
+        STAGE_CACHE.put(transcribe_stage_key(audio_sha256, model, language), transcript)
+    else:
+        logger.info("🔊 Starting transcription...")
+        transcribe_start, decode_mark = time.time(), audio.decode_time
+        transcript, from_cache = transcribe_stage(audio, audio_sha256, model, language)
+        if from_cache:
+            cached_stages.append("transcription")
+        # Stage timings exclude the one-off decode, reported separately
+        transcribe_time = time.time() - transcribe_start - (audio.decode_time - decode_mark)
+    if not from_cache:
+        STAGE_LATENCY.labels(stage="transcription", model=model).observe(transcribe_time)
+    detected_language = transcript["language"]
+    logger.info(f"✅ Transcription completed in {transcribe_time:.2f}s")
+    
+    # Step 2: Align timestamps (phoneme-level precision)
+    alignment_mode, align_budget = parse_alignment(alignment)
+    total_segments = len(transcript["segments"])
+    if alignment_mode in ("none", "deferred"):
+        # Raw Whisper timestamps (deferred alignment is queued by the endpoint)
+        result = {"segments": transcript["segments"], "word_segments": []}
+        aligned_segments, align_time = 0, 0
+    else:
+        logger.info("⏱️ Aligning timestamps...")
+        align_start, decode_mark = time.time(), audio.decode_time
+        result, from_cache = align_stage(audio, audio_sha256, model, language, transcript, budget=align_budget)
+        if from_cache:
+            cached_stages.append("alignment")
+        align_time = time.time() - align_start - (audio.decode_time - decode_mark)
+        if not from_cache and align_budget is None:
+            STAGE_LATENCY.labels(stage="alignment", model=f"align-{detected_language}").observe(align_time)
+        aligned_segments = result.get("aligned_segments", total_segments)
+        logger.info(f"✅ Alignment completed in {align_time:.2f}s")
+    
+    segments = result["segments"]
+    diarize_time = 0
+    diarized = False
+    recognized_speakers = {}
+    
+    # Step 3: Join the speaker diarization (if requested and token available)
+    if diarize_future is not None:
+        join_start = time.time()
+        
+        try:
+            diarized_output, from_cache, diarize_time = diarize_future.result()
+            if from_cache:
+                cached_stages.append("diarization")
+            logger.info(f"🎭 Diarization joined after waiting {time.time() - join_start:.2f}s")
+            
+            turns, recognized_speakers = name_speakers(
+                diarized_output["turns"], diarized_output.get("centroids", {})
+            )
+            result = assign_speakers(turns, result)
+            segments = result["segments"]
+            
+            diarized = True
+            if not from_cache:
+                STAGE_LATENCY.labels(stage="diarization", model=DEFAULT_DIARIZATION_MODEL).observe(diarize_time)
+            logger.info(f"✅ Diarization completed in {diarize_time:.2f}s")
+        except Exception as e:
+            logger.error(f"❌ Diarization failed: {e}")
+            logger.warning("⚠️ Continuing without diarization")
+            diarize_time = 0
+    elif diarization and not HUGGINGFACE_TOKEN:
+        logger.warning("⚠️ Diarization requested but HUGGINGFACE_TOKEN not set")
+    
+    # Format response
+    total_time = time.time() - start_time
+    if not cached_stages and audio.is_decoded and audio.duration > 0:
+        REALTIME_FACTOR.labels(model=model).observe(total_time / audio.duration)
+    
+    # Extract full text
+    full_text = " ".join([seg.get("text", "").strip() for seg in segments])
+    
+    # Format segments
+    formatted_segments = []
+    for i, seg in enumerate(segments):
+        formatted_segments.append({
+            "id": i,
+            "start": seg.get("start", 0),
+            "end": seg.get("end", 0),
+            "text": seg.get("text", "").strip(),
+            "speaker": seg.get("speaker", None) if diarization else None
+        })
+    
+    return {
+        "text": full_text,
+        "segments": formatted_segments,
+        "language": detected_language,
+        "processing_time": {
+            "decode": audio.decode_time,
+            "transcription": transcribe_time,
+            "alignment": align_time,
+            "diarization": diarize_time,
+            "total": total_time,
+            "cached": False,
+            "cached_stages": cached_stages
+        },
+        "backend": "whisperx",
+        "model": model,
+        "device": DEVICE,
+        "diarization_enabled": diarized,
+        "recognized_speakers": recognized_speakers,
+        "alignment": {
+            "mode": alignment_mode,
+            "aligned_segments": aligned_segments,
+            "total_segments": total_segments
+        }
+    }
+
+
+def result_cache_key(
+    audio_sha256: str,
+    language: Optional[str] = "fr",
+    model: Optional[str] = "base",
+    diarization: Optional[bool] = False,
+    min_speakers: Optional[int] = None,
+    max_speakers: Optional[int] = None,
+    alignment: Optional[str] = "full",
+) -> str:
+    """Result cache key: audio SHA-256 + parameters that change the output"""
+    diarized = bool(diarization) and HUGGINGFACE_TOKEN is not None
+    # Full alignment keeps the keys it had before the alignment option existed
+    alignment_params = {} if (alignment or "full") == "full" else {"alignment": alignment}
+    return make_cache_key(
+        audio_sha256,
+        language=language,
+        model=model,
+        diarization=diarized,
+        min_speakers=min_speakers if diarized else None,
+        max_speakers=max_speakers if diarized else None,
+        # Speaker names depend on the enrolled voiceprints
+        voiceprints=VOICEPRINTS.fingerprint() if diarized else None,
+        **alignment_params
+    )
+
+
+def is_cacheable(response: dict, diarization: Optional[bool]) -> bool:
+    """Don't cache a diarized request whose diarization step failed, nor a partial alignment"""
+    alignment = response.get("alignment", {})
+    if alignment.get("mode") == "budget" and alignment.get("aligned_segments") != alignment.get("total_segments"):
+        return False
+    return not (diarization and HUGGINGFACE_TOKEN) or response.get("diarization_enabled", False)
+
+
+def as_cached_response(response: dict, elapsed: float) -> dict:
+    """Mark a stored response as served from the result cache"""
+    response["processing_time"] = {
+        "transcription": 0,
+        "alignment": 0,
+        "diarization": 0,
+        "total": elapsed,
+        "cached": True
+    }
+    return response
+
+
+def transcribe_with_cache(audio_path: str, **params) -> dict:
+    """Blocking pipeline with result cache lookup/store (used by job workers)"""
+    start_time = time.time()
+    audio_sha256 = file_sha256(audio_path)
+    cache_key = result_cache_key(audio_sha256, **params)
+    cached = RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info("💾 Result cache hit")
+        return as_cached_response(cached, time.time() - start_time)
+    
+    response = run_transcription_pipeline(audio_path, audio_sha256=audio_sha256, **params)
+    if is_cacheable(response, params.get("diarization")):
+        RESULT_CACHE.put(cache_key, response)
+    return response
+
+
+# Short clips from concurrent requests share one faster-whisper call
+ASR_BATCHER = ASRBatcher(get_or_load_model, ASR_BATCH_MAX_REQUESTS, ASR_BATCH_WAIT_MS)
+
+
+async def transcribe_batched(
+    audio: DecodedAudio,
+    audio_sha256: str,
+    model: str,
+    language: Optional[str],
+    diarization: Optional[bool]
+) -> Optional[Tuple[dict, float]]:
+    """
+    Transcribe a short clip in a cross-request batch -> (transcript, seconds)
+    None when the clip goes through the regular pipeline: batching disabled,
+    auto-detected language, diarization (runs in parallel with ASR there),
+    cached transcript, long clip, or batch failure.
+    """
+    if not ASR_BATCHER.enabled or not language or (diarization and HUGGINGFACE_TOKEN):
+        return None
+    if await asyncio.to_thread(STAGE_CACHE.get, transcribe_stage_key(audio_sha256, model, language)) is not None:
+        return None
+    # ffmpeg only: decode off the inference pool so clips reach the batcher together
+    await asyncio.to_thread(lambda: audio.samples)
+    if not ASR_BATCHER.accepts(language, audio.duration):
+        return None
+    start = time.time()
+    try:
+        transcript = await ASR_BATCHER.transcribe(model, language, audio.samples)
+    except Exception as e:
+        logger.warning(f"⚠️ Batched transcription failed, running the clip alone: {e}")
+        return None
+    return transcript, time.time() - start
+
+
+def defer_alignment(audio_path: str, filename: str, params: dict) -> dict:
+    """
+    Queue the fully aligned transcription as a low-priority job
+    The transcription (and diarization) stages are cached by then, so the job
+    only runs the alignment. The upload is moved into the job store.
+    """
+    job_audio_path = JOB_QUEUE.new_audio_path(suffix=Path(filename).suffix)
+    shutil.move(audio_path, job_audio_path)
+    job = JOB_QUEUE.submit(job_audio_path, params=dict(params, alignment="full"), priority=-1)
+    logger.info(f"⏳ Alignment deferred to job {job['job_id']}")
+    return {
+        "mode": "deferred",
+        "job_id": job["job_id"],
+        "status_url": f"/jobs/{job['job_id']}",
+        "result_url": f"/jobs/{job['job_id']}/result"
     }
 
 
@@ -155,6 +824,7 @@ async def transcribe_audio(
     diarization: Optional[bool] = Form(False),
     min_speakers: Optional[int] = Form(None),
     max_speakers: Optional[int] = Form(None),
+    alignment: Optional[str] = Form("full"),
 ):
     """
     Transcribe audio with optional speaker diarization
@@ -166,126 +836,90 @@ async def transcribe_audio(
     - diarization: Enable speaker diarization
     - min_speakers: Minimum number of speakers (optional)
     - max_speakers: Maximum number of speakers (optional)
+    - alignment: Word-level alignment (default: full)
+      - full: align every segment
+      - none: raw Whisper timestamps
+      - deferred: raw timestamps now, aligned result later from the job in
+        `alignment.job_id` (GET /jobs/{job_id}/result)
+      - budget=<seconds>: align segments in order until the time limit
     """
     
-    logger.info(f"🎙️ Transcription request: model={model}, language={language}, diarization={diarization}")
+    alignment_mode, _ = parse_alignment(alignment)
+    if alignment_mode == "deferred":
+        require_job_queue()
+    logger.info(f"🎙️ Transcription request: model={model}, language={language}, diarization={diarization}, alignment={alignment}")
     
     start_time = time.time()
     temp_audio_path = None
     
     try:
-        # Save uploaded file temporarily
+        # Spool uploaded file to disk in fixed-size chunks (hashed on the fly)
         with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as temp_file:
             temp_audio_path = temp_file.name
-            content = await file.read()
-            temp_file.write(content)
+        upload_size, audio_sha256 = await spool_upload(file, temp_audio_path)
         
-        logger.info(f"📤 Audio saved: {len(content) / 1024:.2f} KB")
+        logger.info(f"📤 Audio saved: {upload_size / 1024:.2f} KB")
         
-        # Step 1: Load model
-        whisper_model = get_or_load_model(model)
+        params = {
+            "language": language,
+            "model": model,
+            "diarization": diarization,
+            "min_speakers": min_speakers,
+            "max_speakers": max_speakers,
+            "alignment": alignment
+        }
         
-        # Step 2: Transcribe
-        logger.info("🔊 Starting transcription...")
-        transcribe_start = time.time()
-        result = whisper_model.transcribe(
-            temp_audio_path,
-            language=language,
-            batch_size=16
-        )
-        transcribe_time = time.time() - transcribe_start
-        logger.info(f"✅ Transcription completed in {transcribe_time:.2f}s")
+        if alignment_mode == "deferred":
+            # Fully aligned result already known: nothing to defer
+            full_key = await asyncio.to_thread(result_cache_key, audio_sha256, **dict(params, alignment="full"))
+            cached = await asyncio.to_thread(RESULT_CACHE.get, full_key)
+            if cached is not None:
+                logger.info("💾 Result cache hit (aligned), skipping transcription")
+                return JSONResponse(as_cached_response(cached, time.time() - start_time))
+            params["alignment"] = "none"
         
-        # Step 3: Align timestamps (phoneme-level precision)
-        logger.info("⏱️ Aligning timestamps...")
-        align_start = time.time()
-        model_a, metadata = whisperx.load_align_model(
-            language_code=result.get("language", language),
-            device=DEVICE
-        )
-        result = whisperx.align(
-            result["segments"],
-            model_a,
-            metadata,
-            temp_audio_path,
-            DEVICE,
-            return_char_alignments=False
-        )
-        align_time = time.time() - align_start
-        logger.info(f"✅ Alignment completed in {align_time:.2f}s")
+        # Same audio + same parameters already transcribed: serve from cache
+        # Off the event loop: the key reads the voiceprint store
+        cache_key = await asyncio.to_thread(result_cache_key, audio_sha256, **params)
+        cached = await asyncio.to_thread(RESULT_CACHE.get, cache_key)
+        if cached is not None:
+            logger.info("💾 Result cache hit, skipping transcription")
+            response = as_cached_response(cached, time.time() - start_time)
+            if alignment_mode == "deferred":
+                response["alignment"] = {
+                    **response.get("alignment", {}),
+                    **await asyncio.to_thread(defer_alignment, temp_audio_path, file.filename, params)
+                }
+            return JSONResponse(response)
         
-        segments = result["segments"]
-        
-        # Step 4: Speaker diarization (if requested and token available)
-        if diarization and HUGGINGFACE_TOKEN:
-            logger.info("🎭 Starting speaker diarization...")
-            diarize_start = time.time()
-            
-            try:
-                # Use pyannote.audio directly (new WhisperX API)
-                from pyannote.audio import Pipeline as DiarizationPipeline
-                
-                diarize_model = DiarizationPipeline.from_pretrained(
-                    "pyannote/speaker-diarization-3.1",
-                    use_auth_token=HUGGINGFACE_TOKEN
-                )
-                diarize_model.to(torch.device(DEVICE))
-                
-                diarize_segments = diarize_model(
-                    temp_audio_path,
-                    min_speakers=min_speakers,
-                    max_speakers=max_speakers
-                )
-                
-                result = whisperx.assign_word_speakers(diarize_segments, result)
-                segments = result["segments"]
-                
-                diarize_time = time.time() - diarize_start
-                logger.info(f"✅ Diarization completed in {diarize_time:.2f}s")
-            except Exception as e:
-                logger.error(f"❌ Diarization failed: {e}")
-                logger.warning("⚠️ Continuing without diarization")
-                diarize_time = 0
-        elif diarization and not HUGGINGFACE_TOKEN:
-            logger.warning("⚠️ Diarization requested but HUGGINGFACE_TOKEN not set")
-            diarize_time = 0
+        # Heavy work runs on the inference executor, off the event loop
+        with DecodedAudio(temp_audio_path) as audio:
+            batched = await transcribe_batched(audio, audio_sha256, model, language, diarization)
+            response = await run_inference(
+                _run_pipeline_stages,
+                audio,
+                audio_sha256=audio_sha256,
+                batched=batched,
+                **params
+            )
+        if is_cacheable(response, diarization):
+            await asyncio.to_thread(RESULT_CACHE.put, cache_key, response)
+        if alignment_mode == "deferred":
+            response["alignment"] = {
+                **response.get("alignment", {}),
+                **await asyncio.to_thread(defer_alignment, temp_audio_path, file.filename, params)
+            }
         
-        # Format response
         total_time = time.time() - start_time
-        
-        # Extract full text
-        full_text = " ".join([seg.get("text", "").strip() for seg in segments])
-        
-        # Format segments
-        formatted_segments = []
-        for i, seg in enumerate(segments):
-            formatted_segments.append({
-                "id": i,
-                "start": seg.get("start", 0),
-                "end": seg.get("end", 0),
-                "text": seg.get("text", "").strip(),
-                "speaker": seg.get("speaker", None) if diarization else None
-            })
+        response["processing_time"]["total"] = total_time
         
         logger.info(f"🎉 Total processing time: {total_time:.2f}s")
-        logger.info(f"📊 Performance: {len(content) / 1024 / total_time:.2f} KB/s")
+        logger.info(f"📊 Performance: {upload_size / 1024 / total_time:.2f} KB/s")
         
-        return JSONResponse({
-            "text": full_text,
-            "segments": formatted_segments,
-            "language": result.get("language", language),
-            "processing_time": {
-                "transcription": transcribe_time,
-                "alignment": align_time,
-                "diarization": diarize_time if diarization and HUGGINGFACE_TOKEN else 0,
-                "total": total_time
-            },
-            "backend": "whisperx",
-            "model": model,
-            "device": DEVICE,
-            "diarization_enabled": diarization and HUGGINGFACE_TOKEN is not None
-        })
+        return JSONResponse(response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Transcription error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -314,16 +948,15 @@ async def transcribe_stream(
     temp_audio_path = None
     
     try:
-        # Save uploaded file temporarily
+        # Spool uploaded file to disk in fixed-size chunks
         with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as temp_file:
             temp_audio_path = temp_file.name
-            content = await file.read()
-            temp_file.write(content)
+        upload_size, _ = await spool_upload(file, temp_audio_path)
         
-        logger.info(f"📤 Audio saved for streaming: {len(content) / 1024:.2f} KB")
+        logger.info(f"📤 Audio saved for streaming: {upload_size / 1024:.2f} KB")
         
-        # Load model
-        whisper_model = get_or_load_model(model)
+        # Load model (off the event loop: first load can take a while)
+        whisper_model = await run_inference(get_or_load_model, model)
         
         # Create streaming generator
         generator = transcribe_streaming_generator(
@@ -349,12 +982,213 @@ async def transcribe_stream(
         logger.error(f"❌ Streaming transcription error: {e}")
         if temp_audio_path and os.path.exists(temp_audio_path):
             os.unlink(temp_audio_path)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# 📋 ASYNC JOBS - Long recordings without holding the HTTP connection
+# ═══════════════════════════════════════════════════════════════════════════
+
+JOB_QUEUE = JobQueue(
+    jobs_dir=JOBS_DIR,
+    runner=transcribe_with_cache,
+    workers=JOBS_WORKERS,
+    retention_seconds=JOBS_RETENTION_HOURS * 3600
+)
+
+
+@app.on_event("startup")
+async def start_job_queue():
+    """Open the persistent job queue and start its workers"""
+    try:
+        await JOB_QUEUE.start()
+    except Exception as e:
+        logger.error(f"❌ Could not start job queue: {e}")
+
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await JOB_QUEUE.stop()
+
+
+def require_job_queue():
+    """503 when the job queue could not start (jobs would never run)"""
+    if not JOB_QUEUE.is_running:
+        raise HTTPException(status_code=503, detail="Job queue unavailable")
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    language: Optional[str] = Form("fr"),
+    model: Optional[str] = Form("base"),
+    diarization: Optional[bool] = Form(False),
+    min_speakers: Optional[int] = Form(None),
+    max_speakers: Optional[int] = Form(None),
+    priority: Optional[int] = Form(0),
+):
+    """
+    Queue a transcription job and return immediately
+    
+    Same parameters as /transcribe, plus:
+    - priority: Higher runs first (default: 0)
+    
+    Poll GET /jobs/{job_id} then fetch GET /jobs/{job_id}/result
+    """
+    logger.info(f"📋 Job request: model={model}, language={language}, diarization={diarization}, priority={priority}")
+    require_job_queue()
+    
+    audio_path = JOB_QUEUE.new_audio_path(suffix=Path(file.filename).suffix)
+    try:
+        await spool_upload(file, audio_path)
+        
+        return JOB_QUEUE.submit(
+            audio_path,
+            params={
+                "language": language,
+                "model": model,
+                "diarization": diarization,
+                "min_speakers": min_speakers,
+                "max_speakers": max_speakers
+            },
+            priority=priority
+        )
+    except Exception as e:
+        logger.error(f"❌ Could not queue job: {e}")
+        if os.path.exists(audio_path):
+            os.unlink(audio_path)
+        if isinstance(e, HTTPException):
+            raise
+        if isinstance(e, JobQueueUnavailable):
+            raise HTTPException(status_code=503, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status (queued, running, completed, failed, cancelled)"""
+    require_job_queue()
+    job = JOB_QUEUE.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Transcription result of a completed job (same payload as /transcribe)"""
+    require_job_queue()
+    job = JOB_QUEUE.get(job_id, include_result=True)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != COMPLETED:
+        return JSONResponse(
+            status_code=409,
+            content={"detail": f"Job is {job['status']}", "status": job["status"]}
+        )
+    return JSONResponse(job["result"])
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    require_job_queue()
+    job = JOB_QUEUE.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🗂️ VOICEPRINTS - Recognize returning speakers across meetings
+# ═══════════════════════════════════════════════════════════════════════════
+
+ENROLL_MAX_SECONDS = 60  # Audio analyzed for an enrollment sample
+
+
+@app.on_event("startup")
+async def open_voiceprints():
+    """Open the voiceprint store once; if unavailable, speakers keep cluster labels"""
+    if not await asyncio.to_thread(VOICEPRINTS.open):
+        logger.warning("⚠️ Voiceprints disabled: speakers will not be named")
+
+
+def enrollment_speech(audio_path: str) -> np.ndarray:
+    """Speech-only samples of (the first minute of) an enrollment recording"""
+    from live_diarization import detect_speech
+    
+    with DecodedAudio(audio_path) as audio:
+        samples = np.array(audio.samples[:ENROLL_MAX_SECONDS * 16000], dtype=np.float32)
+    speech = detect_speech(samples, 16000)
+    if not speech:
+        return samples[:0]
+    return np.concatenate([samples[int(start * 16000):int(end * 16000)] for start, end in speech])
+
+
+@app.post("/voiceprints", status_code=201)
+async def enroll_voiceprint(
+    file: UploadFile = File(...),
+    name: str = Form(...),
+):
+    """
+    Enroll (or refine) a named voiceprint from a recording of one speaker
+    Enrolling an existing name averages the new sample into its voiceprint.
+    Live sessions can also enroll a detected speaker with
+    {"type": "enroll", "speaker": "SPEAKER_02", "name": "Alice"}.
+    """
+    name = name.strip()
+    if not name:
+        raise HTTPException(status_code=400, detail="Name is required")
+    if not HUGGINGFACE_TOKEN:
+        raise HTTPException(status_code=503, detail="HUGGINGFACE_TOKEN required for speaker embeddings")
+    
+    with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as temp_audio:
+        temp_audio_path = temp_audio.name
+    try:
+        await spool_upload(file, temp_audio_path)
+        speech = await run_inference(enrollment_speech, temp_audio_path)
+        if len(speech) < 16000:
+            raise HTTPException(status_code=422, detail="Not enough speech in the recording (min 1s)")
+        
+        embedding = await EMBEDDING_BATCHER.embed(speech)
+        if embedding is None:
+            raise HTTPException(status_code=500, detail="Speaker embedding extraction failed")
+        return await run_inference(VOICEPRINTS.enroll, name, embedding)
+    except VoiceprintStoreUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    finally:
+        if os.path.exists(temp_audio_path):
+            os.unlink(temp_audio_path)
+
+
+@app.get("/voiceprints")
+async def list_voiceprints():
+    """Enrolled voiceprints (embeddings are not returned)"""
+    try:
+        voiceprints = await asyncio.to_thread(VOICEPRINTS.list)
+    except VoiceprintStoreUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"voiceprints": voiceprints, **await asyncio.to_thread(VOICEPRINTS.stats)}
+
+
+@app.delete("/voiceprints/{voiceprint_id}")
+async def delete_voiceprint(voiceprint_id: str):
+    try:
+        deleted = await asyncio.to_thread(VOICEPRINTS.delete, voiceprint_id)
+    except VoiceprintStoreUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Voiceprint not found")
+    return {"deleted": voiceprint_id}
+
+
 @app.get("/pyannote-models")
 async def list_pyannote_models():
-    """List Pyannote models and their download status"""
+    """List Pyannote models and their download status (HF cache lookup, nothing is loaded)"""
     if not HUGGINGFACE_TOKEN:
         return {
             "available": False,
@@ -362,49 +1196,9 @@ async def list_pyannote_models():
             "models": []
         }
     
-    from pyannote.audio import Pipeline as DiarizationPipeline
-    
-    models = [
-        {
-            "id": "pyannote/speaker-diarization-3.1",
-            "name": "Speaker Diarization 3.1",
-            "size": "1.5 GB",
-            "description": "Main diarization model",
-            "required": True,
-            "main": True
-        },
-        {
-            "id": "pyannote/segmentation-3.0",
-            "name": "Segmentation 3.0",
-            "size": "900 MB",
-            "description": "Auto-downloaded with main model",
-            "required": True,
-            "main": False
-        },
-        {
-            "id": "pyannote/wespeaker-voxceleb-resnet34-LM",
-            "name": "Speaker Embeddings",
-            "size": "500 MB",
-            "description": "Auto-downloaded with main model",
-            "required": True,
-            "main": False
-        }
-    ]
-    
-    # Check each model
-    for model in models:
-        try:
-            DiarizationPipeline.from_pretrained(
-                model["id"],
-                use_auth_token=HUGGINGFACE_TOKEN
-            )
-            model["downloaded"] = True
-        except:
-            model["downloaded"] = False
-    
     return {
         "available": True,
-        "models": models
+        "models": await run_inference(MODEL_AVAILABILITY.models)
     }
 
 
@@ -420,13 +1214,8 @@ async def download_pyannote_model(model_id: str = Form(...)):
     try:
         logger.info(f"📥 Downloading Pyannote model: {model_id}")
         
-        from pyannote.audio import Pipeline as DiarizationPipeline
-        
-        # Download the model
-        DiarizationPipeline.from_pretrained(
-            model_id,
-            use_auth_token=HUGGINGFACE_TOKEN
-        )
+        # Fetch the repository files only: no pipeline is instantiated
+        await run_inference(MODEL_AVAILABILITY.download, model_id, HUGGINGFACE_TOKEN)
         
         logger.info(f"✅ Model {model_id} downloaded successfully!")
         
@@ -457,14 +1246,11 @@ async def download_models(model: str = Form("base")):
             logger.info("🎭 Downloading Pyannote diarization models...")
             logger.info("   └─ This may take 5-10 minutes for first download (2.88 GB)")
             
-            from pyannote.audio import Pipeline as DiarizationPipeline
-            
             # Download diarization model (will auto-download dependencies)
+            # and keep it in the shared registry for the next requests
             logger.info("   └─ Downloading pyannote/speaker-diarization-3.1...")
-            diarize_model = DiarizationPipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1",
-                use_auth_token=HUGGINGFACE_TOKEN
-            )
+            await run_inference(DIARIZATION_PIPELINES.get, DEVICE, HUGGINGFACE_TOKEN)
+            MODEL_AVAILABILITY.refresh()
             logger.info("   └─ ✅ All models downloaded")
             
             return {
@@ -478,7 +1264,7 @@ async def download_models(model: str = Form("base")):
             }
         else:
             # Download Whisper model
-            get_or_load_model(model)
+            await run_inference(get_or_load_model, model)
             return {"status": "success", "model": model}
             
     except Exception as e:
@@ -507,12 +1293,43 @@ async def websocket_live_diarization(websocket: WebSocket):
     2. Start this WebSocket for speaker identification
     3. Combine results: Gemini text + Pyannote speaker
     """
+    sessions = WEBSOCKET_SESSIONS.labels(endpoint="/ws/live-diarization")
+    sessions.inc()
     try:
         from live_diarization import handle_live_diarization
         await handle_live_diarization(websocket)
     except Exception as e:
         logger.error(f"❌ Live diarization error: {e}")
         await websocket.close(code=1011, reason=str(e))
+    finally:
+        sessions.dec()
+
+
+@app.websocket("/ws/live-transcribe")
+async def websocket_live_transcribe(websocket: WebSocket):
+    """
+    📝 Live Transcription + Speaker Diarization via WebSocket
+    
+    Protocol:
+    - Connect: ws://localhost:8082/ws/live-transcribe?model=base&language=fr
+    - Send: Binary audio chunks (PCM 16kHz, 16-bit, mono) - same as /ws/live-diarization
+    - Receive: JSON messages
+      {"type": "partial", "text": "...", "start": 1.2, "end": 3.0, "speaker": "SPEAKER_01"}
+      {"type": "final", "text": "...", "start": 1.2, "end": 3.4, "speaker": "SPEAKER_01"}
+      {"type": "speaker_change", "from": "SPEAKER_01", "to": "SPEAKER_02"}
+    
+    One socket and one audio path per meeting: no separate transcriber needed.
+    """
+    sessions = WEBSOCKET_SESSIONS.labels(endpoint="/ws/live-transcribe")
+    sessions.inc()
+    try:
+        from live_transcription import handle_live_transcription
+        await handle_live_transcription(websocket, load_model=get_or_load_model)
+    except Exception as e:
+        logger.error(f"❌ Live transcription error: {e}")
+        await websocket.close(code=1011, reason=str(e))
+    finally:
+        sessions.dec()
 
 
 @app.get("/live-diarization/status")
@@ -538,6 +1355,11 @@ async def live_diarization_status():
             "device": DEVICE,
             "gpu_available": torch.cuda.is_available(),
             "endpoint": "ws://localhost:8082/ws/live-diarization",
+            "transcription_endpoint": "ws://localhost:8082/ws/live-transcribe",
+            "embedding_batcher": EMBEDDING_BATCHER.stats(),
+            "vad_batcher": LIVE_VAD.stats(),
+            "sessions": LIVE_SESSIONS.stats(),
+            "lag_budget_seconds": LIVE_LAG_BUDGET_SECONDS,
             "protocol": {
                 "input": "Binary PCM audio (16kHz, 16-bit, mono)",
                 "output": "JSON messages with speaker identification"
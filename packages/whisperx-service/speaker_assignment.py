@@ -0,0 +1,78 @@
+"""
+🏷️ Speaker-to-word assignment
+Drop-in replacement for `whisperx.assign_word_speakers` (without fill_nearest).
+whisperx rebuilds a pandas column over every diarization turn for every
+segment and every word, which is O(words x turns): minutes on a long meeting
+with thousands of turns.
+
+Here segments and words are swept once in start order against the turns
+sorted by start. A heap holds the turns still open at the current position,
+so each query only looks at the few turns that overlap it:
+O((words + turns) log turns).
+
+Same rule as whisperx: a segment/word gets the speaker with the largest total
+overlap; if no turn overlaps it, it keeps no speaker.
+"""
+
+import heapq
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def _speakers_for(
+    queries: Sequence[Tuple[float, float]],
+    turns: Sequence[dict]
+) -> List[Optional[str]]:
+    """Best-overlapping speaker of each (start, end) query"""
+    ordered = sorted(turns, key=lambda turn: turn["start"])
+    starts = [turn["start"] for turn in ordered]
+    ends = [turn["end"] for turn in ordered]
+    speakers = [turn["speaker"] for turn in ordered]
+
+    labels: List[Optional[str]] = [None] * len(queries)
+    open_turns: List[Tuple[float, int]] = []  # (end, turn index) of turns started before the query
+    next_turn = 0
+
+    for q in sorted(range(len(queries)), key=lambda i: queries[i][0]):
+        q_start, q_end = queries[q]
+        # Turns starting before the query become open; forget those already over
+        while next_turn < len(ordered) and starts[next_turn] < q_start:
+            heapq.heappush(open_turns, (ends[next_turn], next_turn))
+            next_turn += 1
+        while open_turns and open_turns[0][0] <= q_start:
+            heapq.heappop(open_turns)
+
+        overlap: Dict[str, float] = {}
+        candidates = [i for _, i in open_turns]
+        candidates.extend(range(next_turn, bisect_left(starts, q_end, lo=next_turn)))
+        for i in candidates:
+            intersection = min(ends[i], q_end) - max(starts[i], q_start)
+            if intersection > 0:
+                overlap[speakers[i]] = overlap.get(speakers[i], 0.0) + intersection
+        if overlap:
+            labels[q] = max(overlap, key=overlap.get)
+    return labels
+
+
+def assign_word_speakers(turns: List[dict], transcript: dict) -> dict:
+    """
+    Label segments and words of an aligned transcript with diarization speakers
+    - turns: [{"start", "end", "speaker"}]
+    - transcript: {"segments": [{"start", "end", "words": [...]}], ...} (modified in place)
+    Words without timestamps (not aligned) are left unlabeled, as in whisperx.
+    """
+    segments = transcript["segments"]
+    items: List[dict] = []
+    queries: List[Tuple[float, float]] = []
+    for seg in segments:
+        items.append(seg)
+        queries.append((seg["start"], seg["end"]))
+        for word in seg.get("words", []):
+            if "start" in word:
+                items.append(word)
+                queries.append((word["start"], word["end"]))
+
+    for item, speaker in zip(items, _speakers_for(queries, turns)):
+        if speaker is not None:
+            item["speaker"] = speaker
+    return transcript
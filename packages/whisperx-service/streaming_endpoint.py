@@ -7,7 +7,10 @@ event: progress
 data: {"status": "...", "progress": 50}
 
 event: segment
-data: {"text": "...", "start": 0, "end": 2.5, "speaker": "..."}
+data: {"id": 0, "text": "...", "start": 0, "end": 2.5, "speaker": null}
+
+event: speakers (diarization only, once all segments are sent)
+data: {"segments": [{"id": 0, "speaker": "SPEAKER_00"}]}
 
 event: complete
 data: {"total_segments": 10}
@@ -20,6 +23,13 @@ import logging
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Max duration of one VAD chunk (Whisper works on 30s windows)
+STREAM_CHUNK_SECONDS = 30.0
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 
 async def transcribe_streaming_generator(
     temp_audio_path: str,
@@ -32,12 +42,20 @@ async def transcribe_streaming_generator(
     """
     Generator that yields transcription segments as Server-Sent Events (SSE)
     Compatible avec le format attendu par le client JavaScript
+    
+    The audio is split into VAD-delimited chunks that are transcribed one
+    after the other; each `segment` event is sent as soon as its chunk is
+    decoded. With diarization, speakers are computed once all chunks are
+    transcribed and sent in a final `speakers` event ({"segments": [{"id", "speaker"}]}).
     """
-    import whisperx
-    import torch
-    from pyannote.audio import Pipeline as DiarizationPipeline
     import time
     import os
+    from audio_decode import DecodedAudio
+    from vad_chunking import iter_speech_chunks
+    from model_cache import DIARIZATION_PIPELINES
+    from voiceprints import VOICEPRINTS
+    from inference_executor import run_inference
+    from speaker_assignment import assign_word_speakers
     
     logger.info("=" * 60)
     logger.info("🚀 STREAMING TRANSCRIPTION STARTED")
@@ -48,61 +66,108 @@ async def transcribe_streaming_generator(
     logger.info(f"🔑 HF Token: {'✅ Set' if huggingface_token else '❌ Not set'}")
     logger.info("=" * 60)
     
+    audio = DecodedAudio(temp_audio_path)
+    with_diarization = bool(diarization and huggingface_token)
+    # Progress share of the transcription phase (the rest is diarization)
+    transcription_share = 70 if with_diarization else 95
+    
     try:
-        # ========== ÉTAPE 1: TRANSCRIPTION ==========
-        logger.info("📊 [STEP 1/3] Starting audio transcription...")
-        yield f"event: progress\ndata: {json.dumps({'status': 'Starting transcription...', 'progress': 10})}\n\n"
-        await asyncio.sleep(0.05)
-        
+        # ========== ÉTAPE 1: DÉCODAGE ==========
+        yield _sse("progress", {"status": "Decoding audio...", "progress": 5})
         transcribe_start = time.time()
-        result = model.transcribe(
-            temp_audio_path,
-            language=language,
-            batch_size=16
-        )
-        transcribe_time = time.time() - transcribe_start
+        await run_inference(lambda: audio.samples)
+        duration = audio.duration
+        total_samples = len(audio.samples)
+        logger.info(f"✅ [STEP 1/3] Audio decoded: {duration:.1f}s")
         
-        logger.info(f"✅ [STEP 1/3] Transcription completed in {transcribe_time:.2f}s")
-        logger.info(f"   └─ Raw segments: {len(result.get('segments', []))}")
-        yield f"event: progress\ndata: {json.dumps({'status': f'Transcription complete ({transcribe_time:.1f}s)', 'progress': 40})}\n\n"
-        await asyncio.sleep(0.05)
+        # ========== ÉTAPE 2: TRANSCRIPTION PAR CHUNKS VAD ==========
+        logger.info("📊 [STEP 2/3] Transcribing VAD chunks...")
+        yield _sse("progress", {"status": "Starting transcription...", "progress": 5})
         
-        # ========== ÉTAPE 2: ALIGNEMENT (SKIP POUR LIVE STREAMING) ==========
-        # Pour du live streaming, on skip l'alignement car il prend 70s+ pour 10s d'audio
-        # Les timestamps de base de Whisper sont suffisamment précis pour du live
-        logger.info("⏭️  [STEP 2/3] SKIPPING alignment for live streaming (too slow: ~70s)")
-        logger.info("   └─ Using raw Whisper timestamps (good enough for realtime)")
+        chunks = iter_speech_chunks(audio.samples, audio.sample_rate, STREAM_CHUNK_SECONDS)
+        segments = []
+        first_segment_time = None
         
-        segments = result["segments"]
+        while True:
+            bounds = await run_inference(next, chunks, None)
+            if bounds is None:
+                break
+            chunk_start, chunk_end = bounds
+            offset = chunk_start / audio.sample_rate
+            
+            result = await run_inference(
+                model.transcribe,
+                audio.samples[chunk_start:chunk_end],
+                language=language,
+                batch_size=16
+            )
+            # Lock the language detected on the first chunk for the next ones
+            language = language or result.get("language")
+            
+            for seg in result.get("segments", []):
+                segment_data = {
+                    "id": len(segments),
+                    "start": seg.get("start", 0) + offset,
+                    "end": seg.get("end", 0) + offset,
+                    "text": seg.get("text", "").strip(),
+                    "speaker": None
+                }
+                segments.append(segment_data)
+                if first_segment_time is None:
+                    first_segment_time = time.time() - transcribe_start
+                    logger.info(f"⚡ First segment after {first_segment_time:.2f}s")
+                yield _sse("segment", segment_data)
+            
+            position = chunk_end / audio.sample_rate
+            progress = 5 + int(chunk_end / max(total_samples, 1) * transcription_share)
+            yield _sse("progress", {"status": f"Transcribed {position:.0f}s / {duration:.0f}s", "progress": progress})
+        
+        transcribe_time = time.time() - transcribe_start
         total_segments = len(segments)
-        logger.info(f"   └─ Raw segments: {total_segments}")
+        logger.info(f"✅ [STEP 2/3] Transcription completed in {transcribe_time:.2f}s")
+        logger.info(f"   └─ Segments: {total_segments}")
         
-        yield f"event: progress\ndata: {json.dumps({'status': 'Skipped alignment (live mode)', 'progress': 60})}\n\n"
-        await asyncio.sleep(0.05)
+        # Pas d'alignement en streaming: ~70s pour 10s d'audio
+        # Les timestamps de base de Whisper sont suffisamment précis pour du live
         
         # ========== ÉTAPE 3: DIARIZATION (optionnelle) ==========
-        if diarization and huggingface_token:
+        if with_diarization and segments:
             logger.info("🎭 [STEP 3/3] Starting speaker diarization...")
-            yield f"event: progress\ndata: {json.dumps({'status': 'Identifying speakers...', 'progress': 70})}\n\n"
-            await asyncio.sleep(0.05)
+            yield _sse("progress", {"status": "Identifying speakers...", "progress": 5 + transcription_share})
             
             try:
                 diarize_start = time.time()
-                diarize_model = DiarizationPipeline.from_pretrained(
-                    "pyannote/speaker-diarization-3.1",
-                    use_auth_token=huggingface_token
+                diarize_model = await run_inference(DIARIZATION_PIPELINES.get, device, huggingface_token)
+                annotation, embeddings = await run_inference(
+                    diarize_model, audio.as_pyannote_input(), return_embeddings=True
+                )
+                # Enrolled voiceprints turn cluster labels into real names
+                # Off the event loop: takes the store lock, may rebuild the IVF index
+                names = await asyncio.to_thread(VOICEPRINTS.identify_clusters, {
+                    label: embeddings[i] for i, label in enumerate(annotation.labels())
+                    if embeddings is not None and i < len(embeddings)
+                })
+                turns = [
+                    {"start": turn.start, "end": turn.end, "speaker": names.get(speaker, speaker)}
+                    for turn, _, speaker in annotation.itertracks(yield_label=True)
+                ]
+                result = await run_inference(
+                    assign_word_speakers,
+                    turns,
+                    {"segments": [dict(seg) for seg in segments]}
                 )
-                diarize_model.to(torch.device(device))
                 
-                diarize_segments = diarize_model(temp_audio_path)
-                result = whisperx.assign_word_speakers(diarize_segments, result)
-                segments = result["segments"]
+                speaker_updates = []
+                for seg, labeled in zip(segments, result["segments"]):
+                    seg["speaker"] = labeled.get("speaker")
+                    speaker_updates.append({"id": seg["id"], "speaker": seg["speaker"]})
+                yield _sse("speakers", {"segments": speaker_updates})
                 
                 diarize_time = time.time() - diarize_start
                 logger.info(f"✅ [STEP 3/3] Diarization completed in {diarize_time:.2f}s")
                 
                 # Compter les locuteurs uniques
-                speakers = set(seg.get("speaker") for seg in segments if seg.get("speaker"))
+                speakers = set(seg["speaker"] for seg in segments if seg["speaker"])
                 logger.info(f"   └─ Unique speakers detected: {len(speakers)}")
                 logger.info(f"   └─ Speakers: {', '.join(sorted(speakers)) if speakers else 'None'}")
                 
@@ -112,44 +177,13 @@ async def transcribe_streaming_generator(
         else:
             logger.info("⏭️  [STEP 3/3] Diarization skipped (disabled or no HF token)")
         
-        # ========== STREAMING DES SEGMENTS ==========
-        logger.info(f"📡 STREAMING {total_segments} SEGMENTS TO CLIENT...")
-        yield f"event: progress\ndata: {json.dumps({'status': 'Streaming segments...', 'progress': 80})}\n\n"
-        await asyncio.sleep(0.05)
-        
-        for i, seg in enumerate(segments):
-            segment_data = {
-                "id": i,
-                "start": seg.get("start", 0),
-                "end": seg.get("end", 0),
-                "text": seg.get("text", "").strip(),
-                "speaker": seg.get("speaker", None)
-            }
-            
-            logger.info(f"   └─ [{i+1}/{total_segments}] Speaker: {segment_data['speaker'] or 'Unknown'} | Text: {segment_data['text'][:50]}...")
-            
-            # Format SSE conforme au client JavaScript
-            yield f"event: segment\ndata: {json.dumps(segment_data)}\n\n"
-            
-            # Petit délai pour effet de streaming visuel
-            await asyncio.sleep(0.02)
-            
-            # Progress update
-            progress = 80 + int((i + 1) / total_segments * 15)
-            yield f"event: progress\ndata: {json.dumps({'status': f'Segment {i+1}/{total_segments}', 'progress': progress})}\n\n"
-        
         # ========== COMPLÉTION ==========
         logger.info("🎉 STREAMING TRANSCRIPTION COMPLETED!")
         logger.info(f"   └─ Total segments: {total_segments}")
         logger.info(f"   └─ Total time: {time.time() - transcribe_start:.2f}s")
         logger.info("=" * 60)
         
-        yield f"event: complete\ndata: {json.dumps({'status': 'Transcription complete!', 'progress': 100, 'total_segments': total_segments})}\n\n"
-        
-        # Cleanup temporary audio file
-        if os.path.exists(temp_audio_path):
-            os.unlink(temp_audio_path)
-            logger.info(f"🗑️  Temporary audio file deleted: {temp_audio_path}")
+        yield _sse("complete", {"status": "Transcription complete!", "progress": 100, "total_segments": total_segments})
         
     except Exception as e:
         logger.error("=" * 60)
@@ -157,9 +191,11 @@ async def transcribe_streaming_generator(
         logger.error(f"   └─ Error: {str(e)}")
         logger.error("=" * 60)
         
-        # Cleanup on error
+        yield _sse("error", {"detail": str(e)})
+    
+    finally:
+        # Cleanup decoded waveform and temporary audio file
+        audio.close()
         if os.path.exists(temp_audio_path):
             os.unlink(temp_audio_path)
-        
-        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
-
+            logger.info(f"🗑️  Temporary audio file deleted: {temp_audio_path}")
@@ -0,0 +1,74 @@
+"""
+📤 Upload spooling for WhisperX
+Copies multipart uploads to disk in fixed-size chunks instead of
+`await file.read()`, so peak memory per request no longer grows with the
+recording length. The SHA-256 used by the result caches is computed on the
+fly while spooling.
+
+Oversized uploads are rejected early:
+- by Content-Length, before the body is read (see `upload_size_limit`)
+- while spooling, for chunked uploads without Content-Length
+
+Configuration:
+- MAX_UPLOAD_MB: maximum upload size (default: 2048)
+"""
+
+import os
+import hashlib
+import logging
+from typing import Tuple
+
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse
+
+from metrics import UPLOAD_BYTES, UPLOAD_SIZE
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "2048"))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Endpoints that accept an audio upload
+UPLOAD_PATHS = ("/transcribe", "/transcribe-stream", "/jobs", "/voiceprints")
+
+
+def _too_large_detail(max_bytes: int) -> str:
+    return f"Upload exceeds the maximum size of {max_bytes // (1024 * 1024)} MB"
+
+
+async def spool_upload(file: UploadFile, dest_path: str, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[int, str]:
+    """
+    Write an upload to dest_path chunk by chunk
+    Returns: (size_in_bytes, sha256_hex)
+    Raises HTTPException(413) if the upload is larger than max_bytes.
+    """
+    declared_size = getattr(file, "size", None)
+    if declared_size is not None and declared_size > max_bytes:
+        raise HTTPException(status_code=413, detail=_too_large_detail(max_bytes))
+
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest_path, "wb") as out:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=_too_large_detail(max_bytes))
+            digest.update(chunk)
+            out.write(chunk)
+    UPLOAD_BYTES.labels().inc(size)
+    UPLOAD_SIZE.labels().observe(size)
+    return size, digest.hexdigest()
+
+
+async def upload_size_limit(request: Request, call_next):
+    """HTTP middleware: reject oversized uploads from Content-Length, before reading the body"""
+    if request.method == "POST" and request.url.path in UPLOAD_PATHS:
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+            logger.warning(f"⚠️ Rejected upload: {int(content_length) / 1024 / 1024:.1f} MB > {MAX_UPLOAD_MB} MB")
+            return JSONResponse(status_code=413, content={"detail": _too_large_detail(MAX_UPLOAD_BYTES)})
+    return await call_next(request)
@@ -0,0 +1,110 @@
+"""
+✂️ VAD chunking for WhisperX
+Splits a decoded waveform into speech chunks of bounded duration, cutting at
+silences detected by Silero VAD.
+
+Chunks are produced incrementally: VAD only runs on the next window of audio,
+so the first chunk is available without scanning the whole recording.
+"""
+
+import threading
+import logging
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Dedicated Silero instance: the live diarization one is used from the event
+# loop, this one from inference workers (Silero keeps internal state per call)
+_vad_model = None
+_vad_utils = None
+_vad_lock = threading.Lock()
+
+
+def _get_vad():
+    global _vad_model, _vad_utils
+    if _vad_model is None:
+        logger.info("🎤 Loading Silero VAD model for chunking...")
+        _vad_model, _vad_utils = torch.hub.load(
+            repo_or_dir='snakers4/silero-vad',
+            model='silero_vad',
+            force_reload=False
+        )
+    return _vad_model, _vad_utils
+
+
+def _speech_regions(window: np.ndarray, sample_rate: int) -> List[Tuple[int, int]]:
+    """Speech regions (sample offsets) inside a window"""
+    with _vad_lock:
+        vad_model, vad_utils = _get_vad()
+        get_speech_timestamps = vad_utils[0]
+        timestamps = get_speech_timestamps(
+            torch.from_numpy(np.ascontiguousarray(window, dtype=np.float32)),
+            vad_model,
+            sampling_rate=sample_rate,
+            threshold=0.5,
+            min_silence_duration_ms=300
+        )
+    return [(ts['start'], ts['end']) for ts in timestamps]
+
+
+def _cut_point(regions: List[Tuple[int, int]], window_len: int, margin: int) -> int:
+    """
+    Where to end the current chunk inside a full window:
+    - speech stops before the window end: cut at the window end (silence)
+    - otherwise: middle of the widest silence between two speech regions
+    - no silence at all: hard cut at the window end
+    """
+    if regions[-1][1] < window_len - margin:
+        return window_len
+    gaps = [
+        (next_start - end, (end + next_start) // 2)
+        for (_, end), (next_start, _) in zip(regions, regions[1:])
+    ]
+    if gaps:
+        return max(gaps)[1]
+    return window_len
+
+
+def iter_speech_chunks(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    max_chunk_seconds: float = 30.0
+) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start_sample, end_sample) of speech chunks, in order
+    Each chunk is at most max_chunk_seconds long, starts and ends on speech,
+    and is cut at a silence whenever one exists. Silent audio is skipped.
+    """
+    max_len = int(max_chunk_seconds * sample_rate)
+    margin = int(0.2 * sample_rate)
+    total = len(samples)
+    pos = 0
+
+    while pos < total:
+        end = min(pos + max_len, total)
+        regions = _speech_regions(samples[pos:end], sample_rate)
+        if not regions:
+            pos = end
+            continue
+
+        cut = end - pos if end == total else _cut_point(regions, end - pos, margin)
+        chunk_regions = [(start, stop) for start, stop in regions if start < cut]
+        chunk_start = pos + chunk_regions[0][0]
+        chunk_end = pos + min(max(stop for _, stop in chunk_regions), cut)
+        if chunk_end > chunk_start:
+            yield chunk_start, chunk_end
+        pos += cut
+
+
+def split_speech_chunks(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    max_chunk_seconds: float = 30.0
+) -> List[Tuple[int, int]]:
+    """All speech chunks of a waveform (see iter_speech_chunks)"""
+    return list(iter_speech_chunks(samples, sample_rate, max_chunk_seconds))
@@ -0,0 +1,359 @@
+"""
+🗂️ Voiceprint store for WhisperX
+Named speaker embeddings persisted on disk, so returning speakers are
+recognized across meetings instead of being re-clustered as SPEAKER_01...
+
+Embeddings come from the same WeSpeakerResNet34 model as live diarization and
+the pyannote 3.1 pipeline, so live profiles, batch clusters and enrollment
+audio all live in one embedding space.
+
+Lookup uses an inverted-file (IVF) index: voiceprints are partitioned around
+k-means centroids and a query only scans the closest partitions. Small stores
+(below VOICEPRINT_IVF_MIN_SIZE) are scanned exactly with a single matrix
+product.
+
+Configuration:
+- VOICEPRINTS_DIR: SQLite database location (default: /app/data/voiceprints)
+- VOICEPRINT_MATCH_THRESHOLD: max cosine distance to accept a name (default: 0.5)
+- VOICEPRINT_IVF_MIN_SIZE: store size above which the IVF index is used (default: 1024)
+- VOICEPRINT_IVF_NPROBE: partitions scanned per query (default: 8)
+
+If the database cannot be opened (unwritable VOICEPRINTS_DIR...), the store
+reports itself unavailable: lookups match nobody and transcription goes on
+with cluster labels, while enrollment and deletion fail.
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VOICEPRINTS_DIR = os.getenv("VOICEPRINTS_DIR", "/app/data/voiceprints")
+VOICEPRINT_MATCH_THRESHOLD = float(os.getenv("VOICEPRINT_MATCH_THRESHOLD", "0.5"))
+VOICEPRINT_IVF_MIN_SIZE = int(os.getenv("VOICEPRINT_IVF_MIN_SIZE", "1024"))
+VOICEPRINT_IVF_NPROBE = int(os.getenv("VOICEPRINT_IVF_NPROBE", "8"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS voiceprints (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_voiceprints_name ON voiceprints (name);
+"""
+
+
+class VoiceprintStoreUnavailable(RuntimeError):
+    """The voiceprint database could not be opened"""
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour index over L2-normalized vectors (cosine)
+
+    k-means coarse quantizer with ~sqrt(n) partitions; a query is compared to
+    the partition centroids, then only to the vectors of the `nprobe` closest
+    partitions. Vectors added after a build go to their closest partition.
+    """
+
+    def __init__(self, nprobe: int = 8, iterations: int = 10, seed: int = 0):
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[List[int]] = []
+
+    def build(self, vectors: np.ndarray):
+        """Partition the rows of `vectors` (spherical k-means)"""
+        n = len(vectors)
+        k = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(self.seed)
+        centroids = vectors[rng.choice(n, size=k, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(k):
+                members = vectors[assignment == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalize(centroids)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assignment == c).tolist() for c in range(k)]
+
+    def add(self, row: int, vector: np.ndarray):
+        self.lists[int(np.argmax(self.centroids @ vector))].append(row)
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """Row indices to scan for `query`"""
+        probes = np.argsort(self.centroids @ query)[::-1][:self.nprobe]
+        return np.fromiter(
+            (row for c in probes for row in self.lists[c]), dtype=np.int64
+        )
+
+
+class VoiceprintStore:
+    """
+    SQLite-backed store of named speaker embeddings with an in-memory index
+
+    One voiceprint per name: enrolling an existing name merges the new
+    embedding into its running average.
+    """
+
+    def __init__(
+        self,
+        voiceprints_dir: str,
+        match_threshold: float = VOICEPRINT_MATCH_THRESHOLD,
+        ivf_min_size: int = VOICEPRINT_IVF_MIN_SIZE,
+        nprobe: int = VOICEPRINT_IVF_NPROBE,
+    ):
+        self.voiceprints_dir = voiceprints_dir
+        self.db_path = os.path.join(voiceprints_dir, "voiceprints.db")
+        self.match_threshold = match_threshold
+        self.ivf_min_size = ivf_min_size
+        self.nprobe = nprobe
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.error: Optional[str] = None  # Why the database could not be opened
+        # In-memory view: row i of _matrix is the normalized embedding of _ids[i]
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._index: Optional[IVFIndex] = None
+        self._indexed_size = 0
+
+    def _available(self) -> bool:
+        """Open the database on first use (lock held); False once opening failed"""
+        if self._conn is None and self.error is None:
+            try:
+                os.makedirs(self.voiceprints_dir, exist_ok=True)
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.row_factory = sqlite3.Row
+                self._conn.executescript(_SCHEMA)
+                self._load()
+            except Exception as e:
+                self._conn = None
+                self.error = str(e)
+                logger.error(f"❌ Voiceprint store unavailable ({self.db_path}): {e}")
+        return self._conn is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._available():
+            raise VoiceprintStoreUnavailable(f"Voiceprint store unavailable: {self.error}")
+        return self._conn
+
+    def open(self) -> bool:
+        """Open the database and load the embeddings (startup); False if unavailable"""
+        with self._lock:
+            return self._available()
+
+    def _load(self):
+        """Rebuild the in-memory matrix from the database"""
+        rows = self._conn.execute(
+            "SELECT id, name, embedding FROM voiceprints ORDER BY created_at"
+        ).fetchall()
+        self._ids = [row["id"] for row in rows]
+        self._names = [row["name"] for row in rows]
+        self._rows = {voiceprint_id: i for i, voiceprint_id in enumerate(self._ids)}
+        if rows:
+            self._matrix = _normalize(np.stack([
+                np.frombuffer(row["embedding"], dtype=np.float32) for row in rows
+            ]))
+        else:
+            self._matrix = None
+        self._index = None
+        self._indexed_size = 0
+        logger.info(f"🗂️ Voiceprint store: {len(self._ids)} enrolled speakers")
+
+    def _ensure_index(self):
+        """(Re)build the IVF index once the store has grown by 25% since the last build"""
+        size = len(self._ids)
+        if size < self.ivf_min_size:
+            self._index = None
+            return
+        if self._index is None or size > self._indexed_size * 1.25:
+            index = IVFIndex(nprobe=self.nprobe)
+            index.build(self._matrix)
+            self._index = index
+            self._indexed_size = size
+
+    def _row(self, row) -> Dict:
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "samples": row["samples"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def enroll(self, name: str, embedding: np.ndarray) -> Dict:
+        """Store (or update) the voiceprint of `name`"""
+        embedding = np.asarray(embedding, dtype=np.float32).ravel()
+        if not np.isfinite(embedding).all() or not np.linalg.norm(embedding):
+            raise ValueError("Invalid speaker embedding")
+        embedding = _normalize(embedding)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            existing = conn.execute(
+                "SELECT * FROM voiceprints WHERE name = ?", (name,)
+            ).fetchone()
+            if existing is not None:
+                samples = existing["samples"]
+                previous = np.frombuffer(existing["embedding"], dtype=np.float32)
+                # Running average of normalized embeddings
+                embedding = _normalize(previous * samples + embedding)
+                conn.execute(
+                    "UPDATE voiceprints SET embedding = ?, samples = ?, updated_at = ? WHERE id = ?",
+                    (embedding.astype(np.float32).tobytes(), samples + 1, now, existing["id"])
+                )
+                voiceprint_id = existing["id"]
+            else:
+                voiceprint_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO voiceprints (id, name, embedding, samples, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 1, ?, ?)",
+                    (voiceprint_id, name, embedding.astype(np.float32).tobytes(), now, now)
+                )
+            conn.commit()
+
+            if voiceprint_id in self._rows:
+                self._matrix[self._rows[voiceprint_id]] = embedding
+            else:
+                self._rows[voiceprint_id] = len(self._ids)
+                self._ids.append(voiceprint_id)
+                self._names.append(name)
+                row = embedding[np.newaxis, :]
+                self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+                if self._index is not None:
+                    self._index.add(self._rows[voiceprint_id], embedding)
+
+            record = conn.execute("SELECT * FROM voiceprints WHERE id = ?", (voiceprint_id,)).fetchone()
+        logger.info(f"🗂️ Enrolled voiceprint: {name}")
+        return self._row(record)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT * FROM voiceprints ORDER BY name"
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def embeddings(self, names: List[str]) -> Dict[str, np.ndarray]:
+        """Normalized embeddings of the given enrolled names (unknown names are skipped)"""
+        with self._lock:
+            if not self._available():
+                return {}
+            rows = {name: i for i, name in enumerate(self._names)}
+            return {name: self._matrix[rows[name]].copy() for name in names if name in rows}
+
+    def delete(self, voiceprint_id: str) -> bool:
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute("DELETE FROM voiceprints WHERE id = ?", (voiceprint_id,))
+            conn.commit()
+            if cursor.rowcount:
+                self._load()
+        return bool(cursor.rowcount)
+
+    def _search(self, queries: np.ndarray) -> List[Tuple[Optional[str], float]]:
+        """Best (name, cosine distance) per normalized query row (lock held)"""
+        if self._matrix is None:
+            return [(None, float("inf"))] * len(queries)
+        self._ensure_index()
+        results = []
+        for query in queries:
+            rows = self._index.candidates(query) if self._index is not None else None
+            if rows is not None and len(rows):
+                similarities = self._matrix[rows] @ query
+                best = int(np.argmax(similarities))
+                row, similarity = int(rows[best]), float(similarities[best])
+            else:
+                similarities = self._matrix @ query
+                row = int(np.argmax(similarities))
+                similarity = float(similarities[row])
+            results.append((self._names[row], 1.0 - similarity))
+        return results
+
+    def identify(self, embedding: np.ndarray) -> Tuple[Optional[str], float]:
+        """
+        Name of the closest enrolled speaker within the match threshold
+        Returns: (name or None, cosine distance)
+        """
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        if not np.isfinite(query).all() or not np.linalg.norm(query):
+            return None, float("inf")
+        with self._lock:
+            if not self._available():
+                return None, float("inf")
+            name, distance = self._search(_normalize(query)[np.newaxis, :])[0]
+        if distance > self.match_threshold:
+            return None, distance
+        return name, distance
+
+    def identify_clusters(self, centroids: Dict[str, np.ndarray]) -> Dict[str, str]:
+        """
+        Map diarization cluster labels to enrolled names
+        Each name is given to at most one cluster (closest clusters first);
+        unmatched clusters are left out of the mapping.
+        """
+        labels = [
+            label for label, centroid in centroids.items()
+            if np.isfinite(centroid).all() and np.linalg.norm(centroid)
+        ]
+        if not labels:
+            return {}
+        queries = _normalize(np.stack([
+            np.asarray(centroids[label], dtype=np.float32).ravel() for label in labels
+        ]))
+        with self._lock:
+            if not self._available():
+                return {}
+            matches = self._search(queries)
+
+        mapping: Dict[str, str] = {}
+        taken = set()
+        for label, (name, distance) in sorted(zip(labels, matches), key=lambda m: m[1][1]):
+            if name is not None and distance <= self.match_threshold and name not in taken:
+                mapping[label] = name
+                taken.add(name)
+        return mapping
+
+    def fingerprint(self) -> str:
+        """Changes whenever a voiceprint is enrolled, updated or deleted (cache keys)"""
+        with self._lock:
+            if not self._available():
+                return ""
+            count, updated_at = self._conn.execute(
+                "SELECT COUNT(*), MAX(updated_at) FROM voiceprints"
+            ).fetchone()
+        return f"{count}:{updated_at or 0}"
+
+    def stats(self) -> Dict:
+        with self._lock:
+            if not self._available():
+                return {"available": False, "error": self.error}
+            return {
+                "available": True,
+                "enrolled": len(self._ids),
+                "index": "ivf" if self._index is not None else "exact",
+                "match_threshold": self.match_threshold,
+            }
+
+
+VOICEPRINTS = VoiceprintStore(VOICEPRINTS_DIR)
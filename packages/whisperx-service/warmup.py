@@ -0,0 +1,98 @@
+"""
+🔥 Startup warm-up of ASR models
+Loads the models listed in PRELOAD_MODELS and runs one dummy inference on
+synthetic audio, so the first real request neither loads weights nor pays
+for the first-call kernel setup. /ready stays at 503 until it is done, and
+keeps answering 503 (degraded) if any target failed to load or run.
+
+Configuration:
+- PRELOAD_MODELS: comma-separated `model[:language]` list, e.g. `base:fr,medium:en`
+  (the language also preloads its alignment model; empty = no warm-up)
+"""
+
+import os
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from inference_executor import run_inference
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "")
+
+SAMPLE_RATE = 16000
+WARMUP_SECONDS = 2.0
+
+
+def parse_preload_spec(spec: str) -> List[Tuple[str, Optional[str]]]:
+    """`base:fr,medium:en,small` -> [("base", "fr"), ("medium", "en"), ("small", None)]"""
+    targets = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        model, _, language = item.partition(":")
+        target = (model.strip(), language.strip() or None)
+        if target[0] and target not in targets:
+            targets.append(target)
+    return targets
+
+
+def synthetic_audio(seconds: float = WARMUP_SECONDS, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Voice-like test signal: a 150 Hz tone with harmonics, amplitude-modulated like syllables"""
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    tone = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 6))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    return (0.1 * tone * envelope).astype(np.float32)
+
+
+class ModelWarmUp:
+    """Progress of the startup warm-up (one entry per model:language target)"""
+
+    def __init__(self, spec: str):
+        self.targets = parse_preload_spec(spec)
+        self.done: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self.seconds = 0.0
+        self.complete = not self.targets
+
+    async def run(self, warm_one: Callable[[str, Optional[str]], None]):
+        """Warm every target on the inference pool; failures are reported, not retried"""
+        start = time.time()
+        for model, language in self.targets:
+            name = f"{model}:{language}" if language else model
+            logger.info(f"🔥 Warming up {name}...")
+            try:
+                await run_inference(warm_one, model, language)
+                self.done.append(name)
+                logger.info(f"✅ {name} warm")
+            except Exception as e:
+                logger.warning(f"⚠️ Warm-up of {name} failed: {e}")
+                self.failed[name] = str(e)
+        self.seconds = round(time.time() - start, 2)
+        self.complete = True
+        logger.info(f"🔥 Warm-up complete in {self.seconds}s ({len(self.done)}/{len(self.targets)} models)")
+        if self.failed:
+            logger.error(f"❌ Preload failed for {', '.join(self.failed)}: node stays not ready")
+
+    @property
+    def ready(self) -> bool:
+        """Every requested target warmed up"""
+        return self.complete and not self.failed
+
+    def status(self) -> dict:
+        return {
+            "complete": self.complete,
+            "ready": self.ready,
+            "degraded": self.complete and bool(self.failed),
+            "targets": [f"{m}:{l}" if l else m for m, l in self.targets],
+            "done": list(self.done),
+            "failed": dict(self.failed),
+            "seconds": self.seconds,
+        }
+
+
+WARMUP = ModelWarmUp(PRELOAD_MODELS)